@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Debugging artifacts of failed steps
+
+Nothing is captured while steps succeed. When one fails, the page is
+captured as it is at that moment: a JPEG screenshot, the DOM and, with
+ARTIFACT_TRACE=true, the Playwright trace of the run so far (tracing
+then records the whole run, which does cost a little on every run).
+Compressing and writing the files happens on a thread while the run goes
+on (a retry, or the cleanup), and old captures are pruned so the
+directory stays within ARTIFACT_MAX_MB and ARTIFACT_MAX_AGE_DAYS.
+
+Every capture is a directory such as
+`artifacts/20250101-090012-123-login/` with `screenshot.jpg`,
+`dom.html.gz`, `trace.zip` (open with `playwright show-trace`) and
+`info.json`.
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+import time
+
+CAPTURE_TIMEOUT_MS = 5000
+
+
+def _dir_size(path):
+    size = 0
+    for root, _dirs, names in os.walk(path):
+        for name in names:
+            try:
+                size += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                # Removed by a concurrent prune
+                pass
+    return size
+
+
+class FailureArtifacts:
+    """Captures failed steps and keeps the capture directory bounded"""
+
+    def __init__(self, directory="artifacts", max_mb=200, max_age_days=7, trace=False):
+        self.directory = directory
+        self.max_bytes = max_mb * 1024 * 1024
+        self.max_age = max_age_days * 24 * 3600
+        self.trace = trace
+        self._writes = []
+
+    @classmethod
+    def from_env(cls):
+        """The capture settings, or None with ARTIFACTS=false"""
+        if os.getenv("ARTIFACTS", "true").lower() != "true":
+            return None
+        return cls(
+            os.getenv("ARTIFACT_DIR", "artifacts"),
+            max_mb=float(os.getenv("ARTIFACT_MAX_MB", "200")),
+            max_age_days=float(os.getenv("ARTIFACT_MAX_AGE_DAYS", "7")),
+            trace=os.getenv("ARTIFACT_TRACE", "false").lower() == "true",
+        )
+
+    async def watch(self, context):
+        """Start tracing a new browser context when traces are enabled"""
+        if not self.trace:
+            return
+        try:
+            await context.tracing.start(screenshots=True, snapshots=True)
+        except Exception as e:
+            logging.warning(f"Could not start tracing: {e}")
+
+    def _capture_dir(self, name):
+        now = time.time()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now))
+        safe_name = re.sub(r"[^\w.-]+", "_", name)
+        path = os.path.join(
+            self.directory, f"{stamp}-{int(now * 1000) % 1000:03d}-{safe_name}"
+        )
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    async def capture(self, page, name, error=None):
+        """Capture `page` after step `name` failed
+
+        Only what needs the live page is awaited; the files are written in
+        the background, see `flush`.
+        """
+        try:
+            path = self._capture_dir(name)
+        except OSError as e:
+            logging.warning(f"Could not create an artifact directory: {e}")
+            return None
+
+        info = {"step": name, "error": error, "captured_at": time.time()}
+        screenshot = dom = None
+        try:
+            info["url"] = page.url
+            screenshot = await page.screenshot(
+                type="jpeg", quality=70, timeout=CAPTURE_TIMEOUT_MS
+            )
+            dom = await page.content()
+        except Exception as e:
+            logging.warning(f"Could not capture the page: {e}")
+
+        if self.trace:
+            try:
+                # Save the run so far and keep recording into a new chunk
+                tracing = page.context.tracing
+                await tracing.stop_chunk(path=os.path.join(path, "trace.zip"))
+                await tracing.start_chunk()
+            except Exception as e:
+                logging.warning(f"Could not save the trace: {e}")
+
+        write = asyncio.get_running_loop().run_in_executor(
+            None, self._write, path, info, screenshot, dom
+        )
+        self._writes.append(asyncio.ensure_future(write))
+        logging.info(f"Capturing failure artifacts of '{name}' to {path}")
+        return path
+
+    def _write(self, path, info, screenshot, dom):
+        try:
+            if screenshot:
+                with open(os.path.join(path, "screenshot.jpg"), "wb") as f:
+                    f.write(screenshot)
+            if dom:
+                with gzip.open(
+                    os.path.join(path, "dom.html.gz"), "wt", encoding="utf-8"
+                ) as f:
+                    f.write(dom)
+            with open(os.path.join(path, "info.json"), "w", encoding="utf-8") as f:
+                json.dump(info, f, indent=2)
+        except OSError as e:
+            logging.warning(f"Could not write failure artifacts to {path}: {e}")
+        self.prune(keep=path)
+
+    def prune(self, keep=None):
+        """Delete captures older than the age limit, then the oldest over size"""
+        try:
+            names = sorted(os.listdir(self.directory))
+        except FileNotFoundError:
+            return
+
+        now = time.time()
+        captures = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                if not os.path.isdir(path):
+                    continue
+                age = now - os.path.getmtime(path)
+            except OSError:
+                continue
+            if path != keep and age > self.max_age:
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            captures.append((path, _dir_size(path)))
+
+        # Names start with the capture time, so this goes oldest first
+        total = sum(size for _path, size in captures)
+        for path, size in captures:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    async def flush(self):
+        """Wait for captures still being written"""
+        writes, self._writes = self._writes, []
+        if writes:
+            await asyncio.gather(*writes, return_exceptions=True)
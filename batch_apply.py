@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Concurrent applications to many vagas for the requests engine
+
+Every target vaga is submitted as its own request, up to `concurrency`
+at a time, and gets its own outcome: applied, skipped or failed. Every
+worker thread sends through a session of its own (`requests` sessions
+are not thread-safe) that shares the engine's cookies and rate limiter.
+Redirects are not followed: a 2xx answer or a 302/303 to anywhere but a
+login page counts as applied.
+
+Each application carries an idempotency key derived from the account and
+the vaga. The key is sent as the Idempotency-Key header, so a retried
+request is not applied twice by a server that honours it, and recorded
+in an SQLite ledger: vagas already applied to are skipped, also on later
+runs and by other workers sharing the ledger.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from storage import connect, transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS applications (
+    idempotency_key TEXT PRIMARY KEY,
+    account TEXT NOT NULL,
+    vaga_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    http_status INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+"""
+# Keys of a vaga's own application URL in API responses
+APPLY_URL_KEYS = ("apply_url", "applyUrl", "action")
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Redirects after a successful form post; one to a login page is not
+APPLIED_REDIRECTS = (302, 303)
+
+
+def idempotency_key(account, vaga_id):
+    """The same key for every attempt of `account` at one vaga"""
+    return hashlib.sha256(f"{account}:{vaga_id}".encode()).hexdigest()[:32]
+
+
+def targets_from_api(content):
+    """Vagas with an id in a vagas API response, or an empty list
+
+    Accepts a JSON list of vagas or an object holding it under `vagas`,
+    `data`, `items` or `results`.
+    """
+    try:
+        data = json.loads(content)
+    except (TypeError, ValueError):
+        return []
+    if isinstance(data, dict):
+        for key in ("vagas", "data", "items", "results"):
+            if isinstance(data.get(key), list):
+                data = data[key]
+                break
+    if not isinstance(data, list):
+        return []
+    return [vaga for vaga in data if isinstance(vaga, dict) and vaga.get("id")]
+
+
+def _applied(response):
+    status = response.status_code
+    if status in APPLIED_REDIRECTS:
+        return "login" not in response.headers.get("Location", "").lower()
+    return 200 <= status < 300
+
+
+class ApplicationLedger:
+    """Which vagas an account applied to, shared through an SQLite file"""
+
+    def __init__(self, path, claim_seconds=600):
+        self.path = path
+        # A claim older than this was left by a crashed run and is retried
+        self.claim_seconds = claim_seconds
+        # Shareable like the job queue, see storage.connect
+        self._db = connect(path)
+        self._db.executescript(SCHEMA)
+
+    def claim(self, key, account, vaga_id):
+        """Reserve an application, or return why it must not be sent"""
+        now = time.time()
+        with transaction(self._db) as db:
+            row = db.execute(
+                "SELECT state, updated_at FROM applications WHERE idempotency_key = ?",
+                (key,),
+            ).fetchone()
+            if row and row[0] == "applied":
+                return "already applied"
+            if row and row[0] == "sending" and now - row[1] < self.claim_seconds:
+                return "being sent by another run"
+            db.execute(
+                "INSERT INTO applications "
+                "(idempotency_key, account, vaga_id, state, updated_at) "
+                "VALUES (?, ?, ?, 'sending', ?) "
+                "ON CONFLICT (idempotency_key) DO UPDATE SET "
+                "state = 'sending', updated_at = excluded.updated_at",
+                (key, account, str(vaga_id), now),
+            )
+        return None
+
+    def record(self, key, applied, http_status, attempts):
+        self._db.execute(
+            "UPDATE applications SET state = ?, http_status = ?, "
+            "attempts = attempts + ?, updated_at = ? WHERE idempotency_key = ?",
+            (
+                "applied" if applied else "failed",
+                http_status,
+                attempts,
+                time.time(),
+                key,
+            ),
+        )
+
+    def close(self):
+        self._db.close()
+
+
+class BatchApplier:
+    """Submits applications to many vagas concurrently, each at most once"""
+
+    def __init__(
+        self,
+        ledger,
+        concurrency=4,
+        retries=1,
+        apply_path="/api/vagas/{id}/apply",
+    ):
+        self.ledger = ledger
+        self.concurrency = concurrency
+        self.retries = retries
+        self.apply_path = apply_path
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            ApplicationLedger(os.getenv("APPLY_LEDGER", "devscout_applications.db")),
+            concurrency=int(os.getenv("APPLY_CONCURRENCY", "4")),
+            retries=int(os.getenv("APPLY_RETRIES", "1")),
+            apply_path=os.getenv("APPLY_PATH", "/api/vagas/{id}/apply"),
+        )
+
+    def _apply_url(self, base_url, vaga):
+        for key in APPLY_URL_KEYS:
+            if isinstance(vaga.get(key), str) and vaga[key]:
+                url = vaga[key]
+                break
+        else:
+            url = self.apply_path.format(id=vaga["id"])
+        return url if url.startswith("http") else f"{base_url}{url}"
+
+    def _submit(self, session, url, key, form_data):
+        """POST one application, retrying throttling and server errors
+
+        `session()` returns the calling thread's session. Returns (applied,
+        http status or None, attempts, error).
+        """
+        response = error = None
+        for attempt in range(1, self.retries + 2):
+            try:
+                response = session().post(
+                    url,
+                    data=form_data,
+                    headers={"Idempotency-Key": key},
+                    timeout=30,
+                    # A redirect to the login page must not count as applied
+                    allow_redirects=False,
+                )
+                error = None
+                if response.status_code not in RETRY_STATUSES:
+                    break
+            except Exception as e:
+                response, error = None, str(e)
+        if response is None:
+            return False, None, attempt, error
+        return _applied(response), response.status_code, attempt, error
+
+    def apply(self, new_session, base_url, account, vagas):
+        """Apply `account` to every vaga in `vagas`, returning one outcome each
+
+        A vaga is a dict with an `id`, optionally its own application URL
+        (`apply_url`, `action`, ...) and `form_data` to post.
+        `new_session()` is called once per worker thread for its session.
+        """
+        started = time.perf_counter()
+        outcomes = []
+        submissions = {}
+        local = threading.local()
+        sessions = []
+
+        def session():
+            if not hasattr(local, "session"):
+                local.session = new_session()
+                sessions.append(local.session)
+            return local.session
+
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix="apply") as pool:
+            for vaga in vagas:
+                key = idempotency_key(account, vaga["id"])
+                skipped = self.ledger.claim(key, account, vaga["id"])
+                if skipped:
+                    outcomes.append(
+                        {"vaga": vaga["id"], "status": "skipped", "reason": skipped}
+                    )
+                    continue
+                future = pool.submit(
+                    self._submit,
+                    session,
+                    self._apply_url(base_url, vaga),
+                    key,
+                    vaga.get("form_data", {}),
+                )
+                submissions[future] = (vaga["id"], key, time.perf_counter())
+
+            # The ledger is only written from this thread
+            for future in as_completed(submissions):
+                vaga_id, key, submitted = submissions[future]
+                applied, http_status, attempts, error = future.result()
+                self.ledger.record(key, applied, http_status, attempts)
+                outcome = {
+                    "vaga": vaga_id,
+                    "status": "applied" if applied else "failed",
+                    "http_status": http_status,
+                    "attempts": attempts,
+                    "ms": (time.perf_counter() - submitted) * 1000,
+                }
+                if error:
+                    outcome["error"] = error
+                outcomes.append(outcome)
+                log = logging.info if applied else logging.warning
+                log(
+                    f"{'✅' if applied else '❌'} Vaga {vaga_id}: "
+                    f"{outcome['status']} (HTTP {http_status}, {attempts} attempt(s))"
+                )
+
+        for worker_session in sessions:
+            worker_session.close()
+
+        counts = {}
+        for outcome in outcomes:
+            counts[outcome["status"]] = counts.get(outcome["status"], 0) + 1
+        summary = ", ".join(
+            f"{count} {status}" for status, count in sorted(counts.items())
+        )
+        logging.info(
+            f"📤 Batch apply: {len(outcomes)} vagas in "
+            f"{time.perf_counter() - started:.1f}s, {summary}",
+            extra={"batch_apply": outcomes},
+        )
+        return outcomes
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Pluggable browser backends for the Playwright automation
+
+A backend decides which browser is launched and how its contexts are
+created; the automation and flow engine are the same for all of them.
+
+    launch(playwright, headless, storage_state) -> (browser, context)
+    new_context(browser, storage_state) -> context
+    close_context(context)
+"""
+
+import logging
+import os
+
+from launch_profiles import (
+    BASE_ARGS,
+    launch_profile,
+    new_profile_context,
+    record_profile_run,
+    resolve_profile_name,
+)
+from persistent_profile import PersistentProfile
+
+
+class ProfileBackend:
+    """Launch profiles from launch_profiles.py, optionally on a persistent profile"""
+
+    def __init__(self, profile="default", persistent_profile=None):
+        self.profile = profile
+        self.persistent_profile = persistent_profile
+        self.profile_name = None
+        self.launch_metrics = None
+
+    @classmethod
+    def from_env(cls, account):
+        return cls(
+            profile=os.getenv("LAUNCH_PROFILE", "default"),
+            # Optional user-data directory whose HTTP cache survives between
+            # runs; one per account, since it keeps the account logged in
+            persistent_profile=PersistentProfile.from_env(account),
+        )
+
+    def describe(self):
+        return f"profile: {self.profile_name or self.profile}"
+
+    @property
+    def can_recycle_context(self):
+        # A persistent context is tied to its browser process
+        return self.persistent_profile is None
+
+    async def launch(self, playwright, headless=True, storage_state=None):
+        if self.profile_name is None:
+            self.profile_name = resolve_profile_name(self.profile)
+        browser, context, metrics = await launch_profile(
+            playwright,
+            self.profile_name,
+            headless=headless,
+            persistent=self.persistent_profile,
+            storage_state=storage_state,
+        )
+        # A relaunch to recycle memory is not the launch the run is judged by
+        if self.launch_metrics is None:
+            self.launch_metrics = metrics
+        return browser, context
+
+    async def new_context(self, browser, storage_state=None):
+        return await new_profile_context(browser, self.profile_name, storage_state)
+
+    async def close_context(self, context):
+        await context.close()
+        if self.persistent_profile:
+            self.persistent_profile.mark_closed()
+
+    def record_run(self, success):
+        # Record the launch cost together with whether the flow completed
+        record_profile_run(self.launch_metrics, success)
+        self.launch_metrics = None
+
+
+class SystemBrowserBackend:
+    """Chromium or Firefox installed on the system, falling back to WebKit"""
+
+    # Common browser installation paths
+    POTENTIAL_PATHS = {
+        "chromium": [
+            "/usr/bin/chromium",
+            "/usr/bin/chromium-browser",
+            "/usr/local/bin/chromium",
+            "/snap/bin/chromium",
+            "/opt/homebrew/bin/chromium",
+            "/home/linuxbrew/.linuxbrew/bin/chromium",
+            "~/.local/bin/chromium",
+        ],
+        "firefox": [
+            "/usr/bin/firefox",
+            "/usr/local/bin/firefox",
+            "/snap/bin/firefox",
+            "/opt/homebrew/bin/firefox",
+            "/home/linuxbrew/.linuxbrew/bin/firefox",
+            "~/.local/bin/firefox",
+        ],
+    }
+
+    can_recycle_context = True
+
+    def __init__(self):
+        self.browser_name = None
+
+    def describe(self):
+        return f"system browser: {self.browser_name}"
+
+    def find_browser_paths(self):
+        """Find installed browsers on the system"""
+        paths = {}
+        for browser_name, path_list in self.POTENTIAL_PATHS.items():
+            for path in path_list:
+                path = os.path.expanduser(path)
+                if os.path.exists(path):
+                    paths[browser_name] = path
+                    logging.info(f"Found {browser_name} at: {path}")
+                    break
+        return paths
+
+    async def launch(self, playwright, headless=True, storage_state=None):
+        options = {"headless": headless, "args": BASE_ARGS}
+        browser_paths = self.find_browser_paths()
+
+        for name in ("chromium", "firefox"):
+            if not browser_paths.get(name):
+                continue
+            try:
+                logging.info(f"Using {name.title()} at: {browser_paths[name]}")
+                return await self._launch(
+                    playwright,
+                    name,
+                    storage_state,
+                    executable_path=browser_paths[name],
+                    **options,
+                )
+            except Exception as e:
+                logging.error(f"Failed to launch {name.title()}: {e}")
+
+        # Fallback to system browsers
+        logging.info("Attempting to use system Safari")
+        return await self._launch(playwright, "webkit", storage_state, **options)
+
+    async def _launch(self, playwright, name, storage_state, **options):
+        browser = await getattr(playwright, name).launch(**options)
+        try:
+            context = await self.new_context(browser, storage_state)
+        except Exception:
+            await browser.close()
+            raise
+        self.browser_name = name
+        logging.info(f"{name.title()} browser setup completed")
+        return browser, context
+
+    async def new_context(self, browser, storage_state=None):
+        return await browser.new_context(storage_state=storage_state)
+
+    async def close_context(self, context):
+        await context.close()
+
+    def record_run(self, success):
+        pass
+
+
+class SimpleBackend:
+    """A Playwright-managed browser with default options, e.g. for demos"""
+
+    can_recycle_context = True
+
+    def __init__(self, browser_name="chromium", **launch_options):
+        self.browser_name = browser_name
+        self.launch_options = launch_options
+
+    def describe(self):
+        return self.browser_name
+
+    async def launch(self, playwright, headless=True, storage_state=None):
+        browser_type = getattr(playwright, self.browser_name)
+        browser = await browser_type.launch(headless=headless, **self.launch_options)
+        try:
+            context = await self.new_context(browser, storage_state)
+        except Exception:
+            await browser.close()
+            raise
+        return browser, context
+
+    async def new_context(self, browser, storage_state=None):
+        return await browser.new_context(storage_state=storage_state)
+
+    async def close_context(self, context):
+        await context.close()
+
+    def record_run(self, success):
+        pass
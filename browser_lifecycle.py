@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Browser resource lifecycle management and leak detection
+
+`BrowserResources` owns the Playwright, browser, context and page
+lifetimes of a run: the backends create them and the run adopts them.
+Every open resource is registered so anything still open after a run can
+be reported, and `LeakDetector` kills browser processes that outlive
+their run.
+"""
+
+import logging
+from contextlib import AsyncExitStack, asynccontextmanager
+
+from process_tree import descendants, kill_processes, list_processes
+
+# id(resource) -> (kind, label) for every resource that is currently open
+_open_handles = {}
+
+
+def open_handles():
+    """Return [(kind, label)] for every managed resource still open"""
+    return list(_open_handles.values())
+
+
+@asynccontextmanager
+async def managed(kind, resource, close, label=None):
+    """Own `resource` until the block exits, then close it with `close()`"""
+    key = id(resource)
+    _open_handles[key] = (kind, label or kind)
+    try:
+        yield resource
+    finally:
+        try:
+            await close()
+        except Exception as e:
+            # Closing a context also closes its pages, so this is expected
+            logging.debug(f"Closing {kind} failed: {e}")
+        finally:
+            _open_handles.pop(key, None)
+
+
+@asynccontextmanager
+async def managed_playwright():
+    """Start Playwright for the duration of the block"""
+    from playwright.async_api import async_playwright
+
+    playwright = await async_playwright().start()
+    async with managed("playwright", playwright, playwright.stop):
+        yield playwright
+
+
+class BrowserResources:
+    """Owns every browser resource of one run and closes them in reverse order"""
+
+    def __init__(self):
+        self._stack = AsyncExitStack()
+
+    async def enter(self, manager):
+        """Enter an async context manager and keep it open until `aclose`"""
+        return await self._stack.enter_async_context(manager)
+
+    async def adopt(self, kind, resource, close, label=None):
+        """Take ownership of an already created resource"""
+        return await self.enter(managed(kind, resource, close, label))
+
+    async def aclose(self):
+        """Close everything this run opened"""
+        stack, self._stack = self._stack, AsyncExitStack()
+        await stack.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+
+class LeakDetector:
+    """Finds browser processes and handles that outlive a run
+
+    `snapshot()` is taken before the run starts and `track()` after the
+    browser is up, so processes that were reparented to init once their
+    parent exited are still recognised as ours. Only tracked processes and
+    their children are killed; other new child processes (an analysis
+    worker, say) are reported but left alone.
+
+    `check()` lists processes and waits for them to exit, so async code
+    runs it on an executor.
+    """
+
+    def __init__(self, kill=True):
+        self.kill = kill
+        self.baseline = set()
+        self.tracked = {}
+
+    def snapshot(self):
+        """Remember the child processes that existed before the run"""
+        self.baseline = set(descendants())
+        self.tracked = {}
+
+    def track(self):
+        """Remember the browser processes started by the run"""
+        processes = list_processes()
+        for pid in descendants(processes=processes):
+            if pid not in self.baseline:
+                self.tracked[pid] = processes[pid][2]
+
+    def check(self):
+        """Report, and optionally kill, whatever the run left behind
+
+        Returns {"processes": [(pid, command)], "untracked": [(pid, command)],
+        "handles": [(kind, label)]}.
+        """
+        processes = list_processes()
+        leaked = {}
+
+        for pid, command in self.tracked.items():
+            # Compare the command too, the pid may have been reused
+            if pid in processes and processes[pid][2] == command:
+                leaked[pid] = command
+                # e.g. renderers the browser started after track()
+                for child in descendants(pid, processes):
+                    leaked[child] = processes[child][2]
+        unknown = {
+            pid: processes[pid][2]
+            for pid in descendants(processes=processes)
+            if pid not in self.baseline and pid not in leaked
+        }
+
+        report = {
+            "processes": sorted(leaked.items()),
+            "untracked": sorted(unknown.items()),
+            "handles": open_handles(),
+        }
+
+        for kind, label in report["handles"]:
+            logging.warning(f"Leaked {kind} handle: {label}")
+        for pid, command in report["processes"]:
+            logging.warning(f"Orphaned browser process {pid} ({command})")
+        for pid, command in report["untracked"]:
+            logging.info(f"Child process {pid} ({command}) outlived the run")
+
+        if leaked and self.kill:
+            stubborn = kill_processes(list(leaked))
+            logging.warning(
+                f"Killed {len(leaked)} orphaned browser process(es)"
+                + (f", {len(stubborn)} needed SIGKILL" if stubborn else "")
+            )
+
+        self.tracked = {}
+        return report
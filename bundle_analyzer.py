@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+API route discovery in the site's external JavaScript bundles
+
+A single-page app keeps its API routes in hashed bundles such as
+`/assets/index-3f9a1c2b.js` rather than in inline scripts. The analyzer
+fetches the bundles a page references, extracts candidate `/api/...`
+routes and caches them keyed by bundle URL and content hash:
+
+  - a URL whose file name carries a hash that was already scanned is not
+    requested at all
+  - other bundles are revalidated with If-None-Match/If-Modified-Since
+    and only rescanned when their sha256 changed
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from urllib.parse import urljoin, urlparse
+
+from storage import atomic_write
+
+ROUTE_PATTERN = re.compile(
+    r"""["'`]((?:https?://[^"'`\s/]+)?/api/[\w\-./{}:$?=&]*)["'`]"""
+)
+FILENAME_HASH = re.compile(r"[.\-_]([0-9a-zA-Z_-]{8,})(?:\.chunk)?\.m?js$")
+VAGAS_ROUTE = re.compile(r"vaga|procurar|search|job", re.IGNORECASE)
+MAX_CACHE_ENTRIES = 100
+
+
+def filename_hash(url):
+    """The content hash build tools put in bundle file names, or None"""
+    match = FILENAME_HASH.search(urlparse(url).path)
+    # Require a digit, so names like `vendor-polyfills.js` do not count
+    if match and any(char.isdigit() for char in match.group(1)):
+        return match.group(1)
+    return None
+
+
+def vagas_route(routes):
+    """The first vagas-related route without placeholders such as `${id}`"""
+    for route in routes:
+        if "{" not in route and VAGAS_ROUTE.search(route):
+            return route
+    return None
+
+
+def extract_routes(source):
+    """Candidate API routes in a JavaScript source, vagas-related ones first"""
+    routes = []
+    for route in ROUTE_PATTERN.findall(source):
+        if route not in routes:
+            routes.append(route)
+    return sorted(routes, key=lambda route: not VAGAS_ROUTE.search(route))
+
+
+class BundleAnalyzer:
+    """Scans same-site script bundles, caching results per URL and hash"""
+
+    def __init__(self, cache_file=".bundle_cache.json", max_bundles=10):
+        self.cache_file = cache_file
+        self.max_bundles = max_bundles
+        self._cache = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.getenv("BUNDLE_CACHE_FILE", ".bundle_cache.json"),
+            max_bundles=int(os.getenv("BUNDLE_MAX_SCRIPTS", "10")),
+        )
+
+    def _load(self):
+        if self._cache is None:
+            try:
+                with open(self.cache_file, encoding="utf-8") as f:
+                    self._cache = json.load(f)
+            except FileNotFoundError:
+                self._cache = {}
+            except (OSError, ValueError) as e:
+                logging.warning(f"Ignoring unreadable bundle cache: {e}")
+                self._cache = {}
+        return self._cache
+
+    def _save(self):
+        cache = self._load()
+        # Keep the most recently used bundles only
+        newest = sorted(cache.items(), key=lambda item: item[1]["used_at"])
+        cache = dict(newest[-MAX_CACHE_ENTRIES:])
+        self._cache = cache
+        try:
+            with atomic_write(self.cache_file) as f:
+                json.dump(cache, f)
+        except OSError as e:
+            logging.warning(f"Could not save the bundle cache: {e}")
+
+    def _routes(self, session, url):
+        """Routes of one bundle, from the cache whenever it is still valid"""
+        cache = self._load()
+        entry = cache.get(url)
+        bundle_hash = filename_hash(url)
+
+        if entry and bundle_hash and entry.get("name_hash") == bundle_hash:
+            entry["used_at"] = time.time()
+            return entry["routes"], "cached"
+
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = session.get(url, headers=headers, timeout=30)
+        if response.status_code == 304 and entry:
+            entry["used_at"] = time.time()
+            return entry["routes"], "not modified"
+        response.raise_for_status()
+
+        sha256 = hashlib.sha256(response.content).hexdigest()
+        if entry and entry.get("sha256") == sha256:
+            status = "unchanged"
+            routes = entry["routes"]
+        else:
+            status = "scanned"
+            routes = extract_routes(response.text)
+
+        cache[url] = {
+            "name_hash": bundle_hash,
+            "sha256": sha256,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "routes": routes,
+            "used_at": time.time(),
+        }
+        return routes, status
+
+    def discover(self, session, page_url, script_srcs):
+        """API routes found in the bundles `script_srcs` of `page_url`"""
+        site = urlparse(page_url).hostname
+        urls = []
+        for src in script_srcs:
+            url = urljoin(page_url, src)
+            # Third-party scripts (analytics, widgets) have no DevScout routes
+            if urlparse(url).hostname == site and url not in urls:
+                urls.append(url)
+
+        routes = []
+        for url in urls[: self.max_bundles]:
+            try:
+                bundle_routes, status = self._routes(session, url)
+            except Exception as e:
+                logging.warning(f"Could not analyze bundle {url}: {e}")
+                continue
+            logging.info(f"Bundle {url}: {len(bundle_routes)} routes ({status})")
+            for route in bundle_routes:
+                if route not in routes:
+                    routes.append(route)
+
+        if urls:
+            self._save()
+        return sorted(routes, key=lambda route: not VAGAS_ROUTE.search(route))
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Checkpoints for resumable automation runs
+
+After every completed step the run records the current URL, the step's
+outputs and, for steps that can be resumed from, the browser storage
+state. A retry then restores the last resumable checkpoint instead of
+starting again from browser launch, navigation and login.
+
+Like the cookie jars, every account has its own file, locked while it is
+read or written and only readable by the owner: the storage state holds
+the account's session cookies.
+"""
+
+import json
+import logging
+import os
+import time
+
+from storage import account_key, atomic_write, locked
+
+
+class CheckpointStore:
+    """One JSON checkpoint file per account"""
+
+    def __init__(self, directory, account, max_age_hours=12):
+        self.directory = directory
+        self.path = os.path.join(directory, f"checkpoint-{account_key(account)}.json")
+        self.max_age = max_age_hours * 3600
+
+    @classmethod
+    def from_env(cls, account):
+        return cls(
+            os.getenv("CHECKPOINT_DIR", ".checkpoints"),
+            account,
+            max_age_hours=float(os.getenv("CHECKPOINT_MAX_AGE_HOURS", "12")),
+        )
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable checkpoint file: {e}")
+            return []
+
+    def _write(self, steps):
+        # Write atomically so a crash never leaves a half-written checkpoint
+        with atomic_write(self.path) as f:
+            json.dump(steps, f)
+
+    def record(self, step, url, outputs, storage_state=None):
+        """Record that `step` completed"""
+        checkpoint = {
+            "step": step,
+            "url": url,
+            "outputs": outputs,
+            "storage_state": storage_state,
+            "resumable": storage_state is not None,
+            "at": time.time(),
+        }
+        try:
+            with locked(self.path):
+                self._write(self._read() + [checkpoint])
+        except OSError as e:
+            logging.warning(f"Could not record checkpoint for {step}: {e}")
+
+    def load(self):
+        """Checkpoints of the current attempt, oldest first ([] if stale)"""
+        try:
+            with locked(self.path):
+                steps = self._read()
+        except OSError as e:
+            logging.warning(f"Could not read checkpoints: {e}")
+            return []
+        if steps and time.time() - steps[-1]["at"] > self.max_age:
+            logging.info("Discarding stale checkpoints")
+            self.clear()
+            return []
+        return steps
+
+    def resume_point(self):
+        """The latest resumable checkpoint, with the outputs gathered so far"""
+        steps = self.load()
+        for index in range(len(steps) - 1, -1, -1):
+            if steps[index]["resumable"]:
+                checkpoint = dict(steps[index])
+                outputs = {}
+                for step in steps[: index + 1]:
+                    outputs.update(step["outputs"])
+                checkpoint["outputs"] = outputs
+                return checkpoint
+        return None
+
+    def clear(self):
+        """Forget this account's checkpoints, e.g. after a successful run"""
+        try:
+            with locked(self.path):
+                os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logging.warning(f"Could not clear checkpoints: {e}")
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Unified DevScout command line
+
+    python cli.py run [--engine playwright|manual|requests]
+                      [--profiler cprofile|sample] [--stall-ms MS]
+    python cli.py schedule [--engine ...]
+    python cli.py worker [--once]
+    python cli.py check [--fresh] [--only CHECK ...] [--base-url URL]
+    python cli.py bench [--profile NAME ...] [--runs N] [--flow]
+
+Engines and their dependencies (Playwright, BeautifulSoup) are imported
+only when the selected command needs them, so `check` and `--help` stay
+fast when launched from cron.
+"""
+
+import time
+
+_STARTED = time.perf_counter()
+
+import argparse
+import logging
+import sys
+
+from config import setup
+from engines import DEFAULT_ENGINE, ENGINES
+
+
+def cmd_run(args):
+    import os
+
+    from engines import run_engine
+
+    # Read by profiling.py, also in worker processes
+    if args.profiler:
+        os.environ["PROFILER"] = args.profiler
+    if args.stall_ms:
+        os.environ["STALL_THRESHOLD_MS"] = str(args.stall_ms)
+
+    return 0 if run_engine(args.engine) else 1
+
+
+def cmd_schedule(args):
+    import scheduler
+
+    scheduler.main(args.engine)
+    return 0
+
+
+def cmd_worker(args):
+    import queue_worker
+
+    return 0 if queue_worker.main(once=args.once) else 1
+
+
+def cmd_check(args):
+    import os
+
+    import health_check
+
+    # Validated here, health_check is only imported by this command
+    unknown = [name for name in args.only or [] if name not in health_check.CHECKS]
+    if unknown:
+        print(
+            f"devscout check: unknown check {', '.join(unknown)} "
+            f"(choose from {', '.join(health_check.CHECKS)})",
+            file=sys.stderr,
+        )
+        return 2
+    if args.base_url:
+        os.environ["BASE_URL"] = args.base_url
+    return 0 if health_check.main(args.only, fresh=args.fresh) else 1
+
+
+def cmd_bench(args):
+    import asyncio
+    import os
+
+    from launch_profiles import (
+        LAUNCH_PROFILES,
+        benchmark_launch,
+        print_profile_summary,
+    )
+    from process_tree import format_bytes
+
+    names = args.profile or list(LAUNCH_PROFILES)
+
+    if args.flow:
+        from engines import run_engine
+
+        # Full runs record launch cost and completion in the stats file
+        for name in names:
+            os.environ["LAUNCH_PROFILE"] = name
+            for _ in range(args.runs):
+                run_engine("playwright")
+        print_profile_summary()
+        return 0
+
+    results = asyncio.run(benchmark_launch(names, args.runs))
+    print(f"{'profile':<24}{'launch':>10}{'memory':>12}")
+    for metrics in results:
+        if "error" in metrics:
+            print(f"{metrics['profile']:<24}{'failed':>10}")
+            continue
+        print(
+            f"{metrics['profile']:<24}{metrics['launch_ms']:>8.0f}ms"
+            f"{format_bytes(metrics['rss_bytes']):>12}"
+        )
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="devscout", description="DevScout daily job search automation"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the automation once")
+    run.add_argument("--engine", choices=list(ENGINES), default=DEFAULT_ENGINE)
+    run.add_argument(
+        "--profiler",
+        choices=["cprofile", "sample"],
+        help="write a profile of the run to PROFILE_DIR",
+    )
+    run.add_argument(
+        "--stall-ms",
+        type=float,
+        help="report event-loop callbacks blocking longer than this",
+    )
+    run.set_defaults(handler=cmd_run)
+
+    schedule = commands.add_parser("schedule", help="run the automation daily")
+    schedule.add_argument("--engine", choices=list(ENGINES), default=None)
+    schedule.set_defaults(handler=cmd_schedule)
+
+    worker = commands.add_parser("worker", help="run jobs from the queue in QUEUE_DB")
+    worker.add_argument(
+        "--once", action="store_true", help="exit once the queue is empty"
+    )
+    worker.set_defaults(handler=cmd_worker)
+
+    check = commands.add_parser("check", help="verify the environment")
+    check.add_argument(
+        "--fresh", action="store_true", help="rerun checks that passed recently"
+    )
+    check.add_argument(
+        "--only",
+        action="append",
+        metavar="CHECK",
+        help="run only this check (repeatable)",
+    )
+    check.add_argument("--base-url", help="check this site instead of BASE_URL")
+    check.set_defaults(handler=cmd_check)
+
+    bench = commands.add_parser("bench", help="measure browser launch profiles")
+    bench.add_argument(
+        "--profile", action="append", help="profile to measure (repeatable)"
+    )
+    bench.add_argument("--runs", type=int, default=1, help="runs per profile")
+    bench.add_argument(
+        "--flow",
+        action="store_true",
+        help="run the full automation per profile instead of only launching",
+    )
+    bench.set_defaults(handler=cmd_bench)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if getattr(args, "engine", None) == "requests":
+        setup("devscout_requests.log")
+    else:
+        setup()
+    logging.info(f"Startup took {(time.perf_counter() - _STARTED) * 1000:.0f} ms")
+
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Configuration and logging setup shared by every entry point
+
+Both are loaded once per process, on first use, instead of at import time.
+"""
+
+import json
+import logging
+import os
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+_config_loaded = False
+_logging_configured = False
+
+
+def load_config():
+    """Load the .env file into the environment (only the first call does work)"""
+    global _config_loaded
+    if _config_loaded:
+        return
+    _config_loaded = True
+
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        logging.debug("python-dotenv not installed, using the process environment")
+        return
+    load_dotenv()
+
+
+def configure_logging(log_file="devscout.log", level=logging.INFO):
+    """Log to `log_file` and the console (only the first call does work)
+
+    Records are written by a background thread, see log_pipeline.py.
+    """
+    global _logging_configured
+    if _logging_configured:
+        return
+    _logging_configured = True
+
+    import log_pipeline
+
+    load_config()
+    log_pipeline.start(log_file, level, LOG_FORMAT)
+
+
+def setup(log_file="devscout.log"):
+    """Load configuration and logging for a script entry point"""
+    load_config()
+    configure_logging(log_file)
+
+
+def base_url():
+    """DevScout base URL, overridable for staging or local mirrors"""
+    load_config()
+    return os.getenv("BASE_URL", "https://devscout.app").rstrip("/")
+
+
+def accounts():
+    """DevScout accounts to automate, as a list of {"email", "password"}
+
+    ACCOUNTS_FILE may point to a JSON list of accounts; otherwise the
+    single account from EMAIL and PASSWORD is used.
+    """
+    load_config()
+    accounts_file = os.getenv("ACCOUNTS_FILE")
+    if accounts_file:
+        with open(accounts_file, encoding="utf-8") as f:
+            return json.load(f)
+    if os.getenv("EMAIL"):
+        return [{"email": os.getenv("EMAIL"), "password": os.getenv("PASSWORD")}]
+    return []
+
+
+def account_password(email):
+    """Password of the configured account `email`, or None"""
+    for account in accounts():
+        if account["email"] == email:
+            return account.get("password")
+    return None
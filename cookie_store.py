@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Persistent cookie jar for the requests engine
+
+Cookies are saved per account after login and loaded into the session
+at startup, so a run whose session cookie is still valid skips the
+CSRF/login round trips. Expired cookies are dropped on load and save;
+the file is locked so concurrent workers never read a half-written jar.
+"""
+
+import logging
+import os
+from http.cookiejar import LoadError, LWPCookieJar
+
+from storage import account_key, atomic_write, locked
+
+
+class CookieStore:
+    """One LWP cookie file per account"""
+
+    def __init__(self, directory, account):
+        self.directory = directory
+        self.path = os.path.join(directory, f"cookies-{account_key(account)}.lwp")
+
+    @classmethod
+    def from_env(cls, account):
+        return cls(os.getenv("COOKIE_JAR_DIR", ".cookies"), account)
+
+    def load_into(self, cookies):
+        """Add the saved, unexpired cookies to a session's cookie jar"""
+        jar = LWPCookieJar(self.path)
+        with locked(self.path):
+            try:
+                # Session cookies are kept too: they are what keeps us logged in
+                jar.load(ignore_discard=True)
+            except FileNotFoundError:
+                return 0
+            except (LoadError, OSError) as e:
+                logging.warning(f"Ignoring unreadable cookie jar: {e}")
+                return 0
+
+        jar.clear_expired_cookies()
+        for cookie in jar:
+            cookies.set_cookie(cookie)
+        logging.info(f"Loaded {len(jar)} saved cookies")
+        return len(jar)
+
+    def save_from(self, cookies):
+        """Save a session's cookies, replacing the previous jar"""
+        jar = LWPCookieJar(self.path)
+        for cookie in cookies:
+            jar.set_cookie(cookie)
+        jar.clear_expired_cookies()
+
+        try:
+            with locked(self.path), atomic_write(self.path) as f:
+                # What LWPCookieJar.save writes, into the owner-only file
+                f.write("#LWP-Cookies-2.0\n")
+                f.write(jar.as_lwp_str(ignore_discard=True))
+        except OSError as e:
+            logging.warning(f"Could not save cookies: {e}")
+            return
+        logging.info(f"Saved {len(jar)} cookies")
+
+    def clear(self):
+        with locked(self.path):
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
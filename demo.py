@@ -5,7 +5,12 @@ Demo script to show how the DevScout automation works without real credentials
 
 import asyncio
 import logging
-from playwright.async_api import async_playwright
+
+from browser_backends import SimpleBackend
+from browser_lifecycle import managed_playwright
+from config import base_url
+from devscout_flow import LOGIN_BUTTON, devscout_steps, is_logged_in
+from flow_engine import FlowRunner
 
 # Configure logging
 logging.basicConfig(
@@ -13,16 +18,26 @@ logging.basicConfig(
 )
 
 
+async def open_demo_page(playwright):
+    """Show the browser for the demo and return (browser, flow, steps)"""
+    browser, context = await SimpleBackend("chromium").launch(
+        playwright, headless=False
+    )
+    page = await context.new_page()
+    steps = {step.name: step for step in devscout_steps(base_url())}
+    return browser, FlowRunner(page), steps
+
+
 async def demo_navigate_only():
     """Demo: Just navigate to DevScout to show it works"""
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False)  # Show browser for demo
-        context = await browser.new_context()
-        page = await context.new_page()
+    async with managed_playwright() as p:
+        browser, flow, steps = await open_demo_page(p)
+        page = flow.page
 
         try:
             logging.info("🚀 Demo: Navigating to DevScout...")
-            await page.goto("https://devscout.app", wait_until="domcontentloaded")
+            if not await flow.run_step(steps["navigate"].replace(settle_ms=0)):
+                return
 
             logging.info("✅ Successfully loaded DevScout homepage!")
 
@@ -31,8 +46,7 @@ async def demo_navigate_only():
             logging.info("📸 Screenshot saved as 'devscout_homepage.png'")
 
             # Look for key elements
-            login_button = await page.query_selector('text="Cadastrar / Login"')
-            if login_button:
+            if not await is_logged_in(page):
                 logging.info("🔍 Found login button - user not logged in")
             else:
                 logging.info("🔍 Login button not found - user might be logged in")
@@ -50,60 +64,37 @@ async def demo_navigate_only():
 
 async def demo_find_buttons():
     """Demo: Try to find the buttons we need to click"""
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False)
-        context = await browser.new_context()
-        page = await context.new_page()
+    async with managed_playwright() as p:
+        browser, flow, steps = await open_demo_page(p)
+        page = flow.page
 
         try:
-            await page.goto("https://devscout.app", wait_until="domcontentloaded")
-            await page.wait_for_timeout(2000)
+            await flow.run_step(steps["navigate"])
 
             logging.info("🔍 Looking for 'procurar vagas' button...")
 
-            # Try to find the button
-            button_found = False
-            selectors = [
-                'button:has-text("procurar vagas")',
-                'button:has-text("Procurar Vagas")',
-                'button:has-text("PROCURAR VAGAS")',
-                '[data-testid*="procurar"]',
-                'a:has-text("procurar vagas")',
-            ]
-
-            for selector in selectors:
-                try:
-                    button = await page.wait_for_selector(selector, timeout=2000)
-                    if button:
-                        logging.info(f"✅ Found button with selector: {selector}")
-                        button_found = True
-                        break
-                except:
-                    continue
+            # Only look for the button, the demo does not click it
+            button_found = await flow.run_step(
+                steps["procurar vagas"].replace(action="wait", timeout_ms=2000)
+            )
 
             if not button_found:
                 logging.info("❌ 'procurar vagas' button not found (might need login)")
 
                 # Let's try clicking login to see what happens
-                try:
-                    login_btn = await page.wait_for_selector(
-                        'text="Cadastrar / Login"', timeout=3000
+                login_btn, _selector = await flow.find_first(
+                    [LOGIN_BUTTON], 3000, "login button"
+                )
+                if login_btn:
+                    logging.info(
+                        "🔍 Found login button - clicking to see the login flow..."
                     )
-                    if login_btn:
-                        logging.info(
-                            "🔍 Found login button - clicking to see the login flow..."
-                        )
-                        await login_btn.click()
-                        await page.wait_for_timeout(3000)
-
-                        # Take screenshot of login form
-                        await page.screenshot(path="devscout_login.png")
-                        logging.info(
-                            "📸 Login screenshot saved as 'devscout_login.png'"
-                        )
-
-                except Exception as e:
-                    logging.info(f"Could not click login button: {e}")
+                    await login_btn.click()
+                    await page.wait_for_timeout(3000)
+
+                    # Take screenshot of login form
+                    await page.screenshot(path="devscout_login.png")
+                    logging.info("📸 Login screenshot saved as 'devscout_login.png'")
 
             # Wait a bit to see the page
             await page.wait_for_timeout(5000)
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+The DevScout automation flow as declarative steps for flow_engine.py
+
+navigate -> login (if needed) -> procurar vagas -> modal -> enviar
+automaticamente. Every Playwright variant runs these same definitions.
+
+With a `RouteMemory` the flow learns the URL the vagas modal lives at and
+later runs open it directly instead of clicking "procurar vagas" on the
+landing page, falling back to the click when the deep link stops working.
+A known deep link also lets work overlap: the modal is read on a page of
+its own while the flow navigates, and after a login the deep link loads
+in a background page while the app settles.
+"""
+
+import asyncio
+import logging
+
+from flow_engine import Step
+
+LOGIN_BUTTON = 'text="Cadastrar / Login"'
+EMAIL_INPUT = 'input[type="email"], input[name="email"], input[placeholder*="email"]'
+PASSWORD_INPUT = 'input[type="password"], input[name="password"]'
+SUBMIT_BUTTON = (
+    'button[type="submit"], button:has-text("Entrar"), button:has-text("Login")'
+)
+
+PROCURAR_SELECTORS = [
+    'button:has-text("procurar vagas")',
+    'button:has-text("Procurar Vagas")',
+    'button:has-text("PROCURAR VAGAS")',
+    '[data-testid*="procurar"]',
+    'a:has-text("procurar vagas")',
+]
+
+MODAL_SELECTORS = [
+    '[role="dialog"]',
+    ".modal",
+    '[data-testid*="modal"]',
+    '[class*="modal"]',
+]
+
+ENVIAR_SELECTORS = [
+    'div:has-text("enviar automaticamente")',
+    'div:has-text("Enviar Automaticamente")',
+    'div:has-text("ENVIAR AUTOMATICAMENTE")',
+    'button:has-text("enviar automaticamente")',
+    'button:has-text("Enviar Automaticamente")',
+    'button:has-text("ENVIAR AUTOMATICAMENTE")',
+    '[data-testid*="enviar"]',
+    'button[type="submit"]',
+]
+
+# Runs in the page on the modal element and returns only what the flow needs
+READ_MODAL = """
+(modal) => {
+    const clean = (text) => (text || "").replace(/\\s+/g, " ").trim();
+    const text = clean(modal.innerText);
+    const counted = text.match(/(\\d+)\\s*vagas?\\b/i) || text.match(/\\d+/);
+
+    const entries = modal.querySelectorAll(
+        'li, [class*="vaga"], [data-testid*="vaga"]'
+    );
+    const vagas = [];
+    for (const entry of entries) {
+        const entryText = clean(entry.innerText);
+        if (entryText) vagas.push(entryText.slice(0, 200));
+        if (vagas.length >= 50) break;
+    }
+
+    const button = [...modal.querySelectorAll("button, [role=button], div")]
+        .reverse()
+        .find((el) => /enviar\\s+automaticamente/i.test(el.innerText || ""));
+
+    return {
+        count: counted ? parseInt(counted[counted.length - 1], 10) : null,
+        vagas,
+        button: button
+            ? {
+                  text: clean(button.innerText),
+                  disabled: button.disabled === true
+                      || button.getAttribute("aria-disabled") === "true",
+              }
+            : null,
+    };
+}
+"""
+
+
+async def is_logged_in(page):
+    """Check if user is already logged in"""
+    try:
+        # Look for login/signup buttons - if present, user is not logged in
+        login_button = await page.query_selector(LOGIN_BUTTON)
+        if login_button:
+            logging.info("User not logged in - login required")
+            return False
+        else:
+            logging.info("User appears to be logged in")
+            return True
+    except Exception as e:
+        logging.error(f"Error checking login status: {e}")
+        return False
+
+
+async def login(runner, step):
+    """Log in with email and password unless already logged in
+
+    With the `submit_with_button` option the submit button is clicked,
+    falling back to pressing Enter in the password field.
+    """
+    page = runner.page
+    if await is_logged_in(page):
+        return True
+
+    logging.info("Starting login process")
+
+    # A deep link may not offer the login button
+    landing_url = step.options.get("landing_url")
+    if landing_url and page.url.rstrip("/") != landing_url.rstrip("/"):
+        await runner.goto(landing_url)
+
+    login_button = await page.wait_for_selector(LOGIN_BUTTON, timeout=step.timeout_ms)
+    await login_button.click()
+
+    # Wait for login form to appear
+    await page.wait_for_timeout(2000)
+
+    email_input = await page.wait_for_selector(EMAIL_INPUT, timeout=step.timeout_ms)
+    await email_input.fill(runner.variables["email"])
+
+    password_input = await page.wait_for_selector(
+        PASSWORD_INPUT, timeout=step.timeout_ms
+    )
+    await password_input.fill(runner.variables["password"])
+
+    submitted = False
+    if step.options.get("submit_with_button"):
+        try:
+            submit_button = await page.wait_for_selector(SUBMIT_BUTTON, timeout=5000)
+            await submit_button.click()
+            logging.info("Clicked submit button")
+            submitted = True
+        except Exception:
+            logging.info("Submit button not found, using Enter key on password field")
+    if not submitted:
+        await password_input.press("Enter")
+
+    # Wait for login to complete. Once the login button is gone the session
+    # is set, and the vagas deep link can load in the background meanwhile
+    settled = asyncio.ensure_future(page.wait_for_timeout(3000))
+    vagas_url = step.options.get("vagas_url")
+    if vagas_url:
+        try:
+            await page.wait_for_selector(LOGIN_BUTTON, state="detached", timeout=3000)
+            await runner.prefetch(vagas_url)
+        except Exception:
+            logging.debug("Login not confirmed yet, not prefetching the vagas page")
+    await settled
+
+    if await is_logged_in(page):
+        logging.info("Login successful")
+        return True
+    logging.error("Login failed")
+    return False
+
+
+async def open_vagas(runner, step):
+    """Open the vagas modal through the learned deep link or the click chain"""
+    route_memory = step.options["route_memory"]
+    vagas_url = route_memory.vagas_url()
+
+    if vagas_url:
+        try:
+            if runner.page.url != vagas_url:
+                await runner.goto(vagas_url)
+            modal, _selector = await runner.find_first(
+                MODAL_SELECTORS, step.timeout_ms, "modal"
+            )
+        except Exception as e:
+            logging.warning(f"Deep link {vagas_url} failed: {e}")
+            modal = None
+        if modal:
+            route_memory.succeeded()
+            return True
+
+        route_memory.failed()
+        logging.info("Falling back to the 'procurar vagas' click chain")
+        await runner.goto(step.options["landing_url"])
+        if not await is_logged_in(runner.page):
+            return False
+
+    # The route is learned only if the click navigates away from here
+    route_memory.clicked(runner.page.url)
+    button, _selector = await runner.find_first(
+        PROCURAR_SELECTORS, step.timeout_ms, "'procurar vagas'"
+    )
+    if not button:
+        logging.error("Could not find 'procurar vagas'")
+        return False
+    await button.click()
+    logging.info("Clicked 'procurar vagas'")
+    return True
+
+
+def read_vagas_at(vagas_url):
+    """A check reading the vagas modal at `vagas_url` on a page of its own"""
+
+    async def read_vagas(runner, page):
+        await page.goto(vagas_url)
+        if await page.query_selector(LOGIN_BUTTON):
+            # Logged out: the login step runs and the modal step reads
+            return None
+        modal = await page.wait_for_selector(", ".join(MODAL_SELECTORS), timeout=5000)
+        # Wait a bit for content to load
+        await page.wait_for_timeout(2000)
+        return await modal.evaluate(READ_MODAL)
+
+    return read_vagas
+
+
+async def check_vagas(runner, step):
+    """Wait for the vagas modal and read the vagas count"""
+    logging.info("Waiting for modal to appear")
+
+    modal, _selector = await runner.find_first(
+        step.selectors, step.timeout_ms, "modal"
+    )
+    if not modal:
+        logging.error("Modal did not appear")
+        return False
+
+    # Already read by the navigate step's check when a deep link is known
+    modal_data = runner.outputs.pop("navigate.read_vagas", None)
+    if modal_data is None:
+        # Wait a bit for content to load
+        await runner.page.wait_for_timeout(2000)
+
+        # One round trip for the modal's fields instead of the whole page text
+        modal_data = await modal.evaluate(READ_MODAL)
+    # Sampled and truncated by the logging pipeline
+    logging.debug("Modal content", extra={"payload": modal_data})
+
+    runner.outputs["vagas"] = modal_data["vagas"]
+    runner.outputs["enviar_button"] = modal_data["button"]
+    if modal_data["count"] is not None:
+        runner.outputs["vagas_count"] = modal_data["count"]
+        logging.info(f"Found {modal_data['count']} vagas")
+    else:
+        logging.info("Could not find specific vagas count, but modal appeared")
+
+    if modal_data["button"] and modal_data["button"]["disabled"]:
+        logging.warning("'Enviar automaticamente' is disabled in the modal")
+
+    route_memory = step.options.get("route_memory")
+    if route_memory:
+        route_memory.learn(runner.page.url)
+    return True
+
+
+def devscout_steps(base_url, submit_with_button=False, route_memory=None):
+    """The full DevScout flow, using deep links learned in `route_memory`"""
+    vagas_url = route_memory.vagas_url() if route_memory else None
+    if route_memory:
+        procurar = Step(
+            "procurar vagas",
+            "custom",
+            handler=open_vagas,
+            timeout_ms=5000,
+            options={"route_memory": route_memory, "landing_url": base_url},
+        )
+    else:
+        procurar = Step("procurar vagas", "click", PROCURAR_SELECTORS, timeout_ms=5000)
+
+    return [
+        Step(
+            "navigate",
+            "goto",
+            # Logged-in sessions skip the landing page
+            url=vagas_url or base_url,
+            settle_ms=2000,
+            resumable=True,
+            # The landing page may already be loaded by prewarm.py
+            options={"skip_if_loaded": True},
+            # Read the modal meanwhile instead of after opening it
+            checks=[read_vagas_at(vagas_url)] if vagas_url else [],
+        ),
+        Step(
+            "login",
+            "custom",
+            handler=login,
+            timeout_ms=10000,
+            resumable=True,
+            options={
+                "submit_with_button": submit_with_button,
+                "landing_url": base_url,
+                # Prefetched once logged in, see login()
+                "vagas_url": vagas_url,
+            },
+        ),
+        procurar,
+        Step(
+            "modal",
+            "custom",
+            MODAL_SELECTORS,
+            handler=check_vagas,
+            timeout_ms=10000,
+            options={"route_memory": route_memory},
+        ),
+        Step(
+            "enviar automaticamente",
+            "click",
+            ENVIAR_SELECTORS,
+            timeout_ms=5000,
+            # Wait a bit to see if there's any confirmation
+            settle_ms=3000,
+        ),
+    ]
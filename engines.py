@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Registry of automation engines, imported only when selected
+
+Importing this module is cheap: Playwright, requests and BeautifulSoup are
+only loaded once an engine is actually run.
+"""
+
+import asyncio
+import importlib
+
+import profiling
+
+# name -> (module, class)
+ENGINES = {
+    "playwright": ("main", "DevScoutAutomation"),
+    "manual": ("main_manual_browser", "DevScoutAutomationManualBrowser"),
+    "requests": ("main_requests", "DevScoutRequestsAutomation"),
+}
+
+DEFAULT_ENGINE = "playwright"
+
+
+def load_engine(name):
+    """Import and return the automation class for engine `name`"""
+    if name not in ENGINES:
+        raise ValueError(
+            f"Unknown engine '{name}', expected one of: {', '.join(ENGINES)}"
+        )
+    module_name, class_name = ENGINES[name]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def is_async(name):
+    return name != "requests"
+
+
+async def run_engine_async(name, email=None, password=None):
+    """Run one automation with a Playwright engine and release its browser"""
+    async with profiling.watch_event_loop():
+        async with load_engine(name)(email=email, password=password) as automation:
+            return await automation.run_automation()
+
+
+def run_engine(name, email=None, password=None):
+    """Run one automation with any engine, returning whether it succeeded
+
+    Without `email` and `password` the account from EMAIL/PASSWORD is used.
+    """
+    with profiling.session(name):
+        if is_async(name):
+            return asyncio.run(run_engine_async(name, email, password))
+
+        with load_engine(name)(email=email, password=password) as automation:
+            return automation.run_automation()
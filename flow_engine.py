@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Declarative step-flow engine shared by every Playwright variant
+
+A flow is a list of `Step` definitions (selectors, readiness conditions,
+timeouts and retries) run in order by a `FlowRunner` on one page. Timing
+is recorded per step, so optimizations to how steps find elements or wait
+for the page live in this one place.
+
+Steps may also use extra pages in the same (authenticated) context: a
+step can prefetch the URL of a later "goto" step, which then takes over
+the already loaded page, and run read-only checks in parallel with it.
+"""
+
+import asyncio
+import copy
+import logging
+import time
+
+
+class Step:
+    """One declarative flow step
+
+    `action` is one of:
+      - "goto": load `url` (formatted with the runner variables)
+      - "click": click the first of `selectors` that appears
+      - "wait": wait for the first of `selectors` to appear
+      - "custom": call `await handler(runner, step)`, which returns a bool
+
+    After the action succeeds the step waits for `ready` (a load state
+    such as "networkidle", or an async callable taking the runner) and
+    then for `settle_ms`. A failed step is attempted `retries` more times.
+    `resumable` marks steps after which a run can be restored from cookies
+    and the current URL alone. A "goto" step with the `skip_if_loaded`
+    option does nothing when the page is already at its URL, e.g. after
+    pre-warming.
+
+    While the step runs, `prefetch` (a URL) is loaded in a background page
+    and every one of `checks` is awaited as `check(runner, page)` on a page
+    of its own; check results are stored as outputs named
+    "<step>.<check function>". Checks must not change any state.
+    """
+
+    ACTIONS = ("goto", "click", "wait", "custom")
+
+    def __init__(
+        self,
+        name,
+        action="click",
+        selectors=(),
+        url=None,
+        handler=None,
+        timeout_ms=5000,
+        retries=0,
+        ready=None,
+        settle_ms=0,
+        wait_until="domcontentloaded",
+        resumable=False,
+        options=None,
+        prefetch=None,
+        checks=(),
+    ):
+        if action not in self.ACTIONS:
+            raise ValueError(f"Unknown step action '{action}'")
+        if action == "custom" and handler is None:
+            raise ValueError(f"Custom step '{name}' needs a handler")
+
+        self.name = name
+        self.action = action
+        self.selectors = list(selectors)
+        self.url = url
+        self.handler = handler
+        self.timeout_ms = timeout_ms
+        self.retries = retries
+        self.ready = ready
+        self.settle_ms = settle_ms
+        self.wait_until = wait_until
+        self.resumable = resumable
+        self.options = dict(options or {})
+        self.prefetch = prefetch
+        self.checks = list(checks)
+
+    def replace(self, **changes):
+        """Return a copy of the step with some attributes changed"""
+        step = copy.copy(self)
+        for key, value in changes.items():
+            if not hasattr(step, key):
+                raise AttributeError(f"Step has no attribute '{key}'")
+            setattr(step, key, value)
+        return step
+
+    def __repr__(self):
+        return f"Step({self.name!r}, {self.action!r})"
+
+
+class FlowRunner:
+    """Runs steps on a page and records how long each one took"""
+
+    def __init__(
+        self,
+        page=None,
+        variables=None,
+        on_page_change=None,
+        selector_stats=None,
+        on_failure=None,
+    ):
+        # Owners replace `page` whenever they recreate the browser page
+        self.page = page
+        self.variables = dict(variables or {})
+        # Learned selector ordering, see selector_stats.py
+        self.selector_stats = selector_stats
+        # Awaited as on_page_change(old, new) when a prefetched page takes over
+        self.on_page_change = on_page_change
+        # Awaited as on_failure(step, error) when a step failed all its attempts
+        self.on_failure = on_failure
+        self.outputs = {}
+        self.timings = []
+        # url -> (page, loading task)
+        self._prefetched = {}
+
+    async def _extra_page(self):
+        return await self.page.context.new_page()
+
+    async def _load(self, page, url, wait_until):
+        try:
+            await page.goto(url, wait_until=wait_until)
+            return True
+        except Exception as e:
+            logging.warning(f"Prefetching {url} failed: {e}")
+            return False
+
+    async def prefetch(self, url, wait_until="domcontentloaded"):
+        """Start loading `url` in a background page for a later `goto`"""
+        if url in self._prefetched or self.page.url.rstrip("/") == url.rstrip("/"):
+            return
+        try:
+            page = await self._extra_page()
+        except Exception as e:
+            logging.warning(f"Could not open a page to prefetch {url}: {e}")
+            return
+        task = asyncio.ensure_future(self._load(page, url, wait_until))
+        self._prefetched[url] = (page, task)
+        logging.info(f"Prefetching {url} in a background page")
+
+    async def _take_prefetched(self, url):
+        """Switch to the page that prefetched `url`, if it loaded"""
+        page, task = self._prefetched.pop(url)
+        if not await task:
+            await page.close()
+            return False
+
+        old_page, self.page = self.page, page
+        if self.on_page_change:
+            await self.on_page_change(old_page, page)
+        logging.info(f"Using the prefetched page for {url}")
+        return True
+
+    async def goto(self, url, wait_until="domcontentloaded"):
+        """Load `url`, taking over the page that prefetched it if there is one"""
+        if url in self._prefetched and await self._take_prefetched(url):
+            return
+        logging.info(f"Navigating to {url}")
+        await self.page.goto(url, wait_until=wait_until)
+
+    async def discard_prefetched(self):
+        """Close background pages that no step used"""
+        for page, task in self._prefetched.values():
+            task.cancel()
+            try:
+                await page.close()
+            except Exception as e:
+                logging.debug(f"Closing a prefetched page failed: {e}")
+        self._prefetched = {}
+
+    async def _run_check(self, check):
+        page = await self._extra_page()
+        try:
+            return await check(self, page)
+        finally:
+            await page.close()
+
+    def _start_checks(self, step):
+        return [asyncio.ensure_future(self._run_check(check)) for check in step.checks]
+
+    async def _finish_checks(self, step, tasks):
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for check, result in zip(step.checks, results):
+            name = f"{step.name}.{check.__name__}"
+            if isinstance(result, Exception):
+                logging.warning(f"Check '{name}' failed: {result}")
+            else:
+                self.outputs[name] = result
+
+    async def find_first(self, selectors, timeout_ms, label="element"):
+        """Return (element, selector) for the first selector that appears
+
+        With selector statistics the historically best selector is tried
+        first, and every attempt is recorded.
+        """
+        stats = self.selector_stats
+        if stats:
+            selectors = stats.order(label, selectors)
+
+        for selector in selectors:
+            started = time.perf_counter()
+            try:
+                element = await self.page.wait_for_selector(
+                    selector, timeout=timeout_ms
+                )
+            except Exception:
+                element = None
+            if stats:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                stats.record(label, selector, bool(element), elapsed_ms)
+            if element:
+                logging.info(f"Found {label} with selector: {selector}")
+                if stats:
+                    stats.lookup(label, selectors, selector)
+                return element, selector
+
+        if stats:
+            stats.lookup(label, selectors, None)
+        return None, None
+
+    def _is_loaded(self, step):
+        if step.action != "goto" or not step.options.get("skip_if_loaded"):
+            return False
+        url = step.url.format(**self.variables).rstrip("/")
+        return self.page.url.rstrip("/") == url
+
+    async def _perform(self, step):
+        if step.action == "goto":
+            await self.goto(step.url.format(**self.variables), step.wait_until)
+            return True
+
+        if step.action == "custom":
+            return await step.handler(self, step)
+
+        element, _selector = await self.find_first(
+            step.selectors, step.timeout_ms, f"'{step.name}'"
+        )
+        if not element:
+            logging.error(f"Could not find '{step.name}'")
+            return False
+
+        if step.action == "click":
+            await element.click()
+            logging.info(f"Clicked '{step.name}'")
+        return True
+
+    async def _wait_ready(self, step):
+        if isinstance(step.ready, str):
+            await self.page.wait_for_load_state(step.ready, timeout=step.timeout_ms)
+        elif step.ready is not None:
+            await step.ready(self)
+
+        if step.settle_ms:
+            await self.page.wait_for_timeout(step.settle_ms)
+
+    async def run_step(self, step):
+        """Run one step with its retries, returning whether it succeeded"""
+        started = time.perf_counter()
+        success = False
+        error = None
+
+        if self._is_loaded(step):
+            logging.info(f"Already at {self.page.url}, skipping '{step.name}'")
+            success = True
+
+        # Overlap with the step: load the next route, run read-only checks
+        if step.prefetch:
+            await self.prefetch(step.prefetch.format(**self.variables), step.wait_until)
+        checks = self._start_checks(step)
+
+        for attempt in range(0 if success else step.retries + 1):
+            if attempt:
+                logging.info(f"Retrying '{step.name}' ({attempt}/{step.retries})")
+            try:
+                success = await self._perform(step)
+                if success:
+                    await self._wait_ready(step)
+                else:
+                    error = f"Could not find '{step.name}'"
+            except Exception as e:
+                logging.error(f"Step '{step.name}' failed: {e}")
+                error = str(e)
+                success = False
+            if success:
+                break
+
+        if checks:
+            await self._finish_checks(step, checks)
+        if not success and self.on_failure:
+            await self.on_failure(step, error)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.timings.append((step.name, elapsed_ms, success))
+        logging.info(
+            f"Step '{step.name}' {'completed' if success else 'failed'} "
+            f"in {elapsed_ms:.0f} ms"
+        )
+        return success
+
+    async def run(self, steps, after_step=None):
+        """Run `steps` in order, stopping at the first failure
+
+        `after_step(step)` is awaited after every successful step.
+        """
+        try:
+            for step in steps:
+                if not await self.run_step(step):
+                    return False
+                if after_step:
+                    await after_step(step)
+            return True
+        finally:
+            await self.discard_prefetched()
+
+    def report(self):
+        """Log the time spent in every step run so far"""
+        if not self.timings:
+            return
+        total = sum(elapsed for _name, elapsed, _success in self.timings)
+        for name, elapsed, success in self.timings:
+            status = "ok" if success else "failed"
+            logging.info(f"Step timing: {name:<24} {elapsed:>8.0f} ms  {status}")
+        logging.info(f"Step timing: {'total':<24} {total:>8.0f} ms")
+        self.timings = []
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Environment health check, with every probe running concurrently
+
+    imports         required packages are installed (found, not imported)
+    config          credentials are configured
+    browser         the configured launch profile starts, and how long it takes
+    system_browsers Chromium/Firefox installs the manual engine can use
+    site            BASE_URL answers, and how fast
+    session         the saved session cookies are still logged in
+
+Probes that passed are cached in HEALTH_CHECK_FILE for HEALTH_CHECK_TTL
+seconds, as long as the configuration they checked did not change, so a
+repeated check only reruns what failed. `--fresh` ignores the cache.
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+
+from config import accounts, base_url, load_config
+from storage import atomic_write
+
+REQUIRED_PACKAGES = {
+    "playwright": "playwright",
+    "dotenv": "python-dotenv",
+    "schedule": "schedule",
+    "requests": "requests",
+    "bs4": "beautifulsoup4",
+}
+PLACEHOLDERS = ("your_email@example.com", "your_password")
+PROBE_TIMEOUT = 30
+HTTP_TIMEOUT = 10
+# Variables whose change invalidates cached results
+CONFIG_VARS = (
+    "BASE_URL",
+    "EMAIL",
+    "ACCOUNTS_FILE",
+    "LAUNCH_PROFILE",
+    "COOKIE_JAR_DIR",
+)
+ICONS = {"ok": "✅", "warn": "⚠️ ", "fail": "❌"}
+
+
+def check_imports():
+    missing = [
+        package
+        for module, package in REQUIRED_PACKAGES.items()
+        if importlib.util.find_spec(module) is None
+    ]
+    if missing:
+        return "fail", f"missing {', '.join(missing)} (run: uv sync)"
+    return "ok", f"{len(REQUIRED_PACKAGES)} packages installed"
+
+
+def check_config():
+    try:
+        configured = accounts()
+    except (OSError, ValueError) as e:
+        return "fail", f"unreadable ACCOUNTS_FILE: {e}"
+    if not configured:
+        if not os.path.exists(".env"):
+            return "fail", "no .env file, copy .env.example to .env"
+        return "fail", "EMAIL and PASSWORD are not set"
+    for account in configured:
+        email, password = account.get("email"), account.get("password")
+        if not password or email in PLACEHOLDERS or password in PLACEHOLDERS:
+            return "fail", f"placeholder or missing credentials for {email}"
+    return "ok", f"{len(configured)} account(s) configured"
+
+
+async def check_browser():
+    from browser_lifecycle import managed_playwright
+    from launch_profiles import launch_profile, resolve_profile_name
+
+    name = resolve_profile_name(os.getenv("LAUNCH_PROFILE", "default"))
+    async with managed_playwright() as playwright:
+        browser, context, metrics = await launch_profile(playwright, name)
+        await context.close()
+        await browser.close()
+    return "ok", f"profile '{name}' launched in {metrics['launch_ms']:.0f} ms"
+
+
+def check_system_browsers():
+    from browser_backends import SystemBrowserBackend
+
+    paths = SystemBrowserBackend().find_browser_paths()
+    if not paths:
+        return "warn", "none found, the manual engine falls back to WebKit"
+    return "ok", ", ".join(f"{name} at {path}" for name, path in paths.items())
+
+
+def _get(url, cookies=None):
+    import urllib.request
+
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(cookies))
+    opener.addheaders = [("User-Agent", "Mozilla/5.0 devscout-health-check")]
+    started = time.perf_counter()
+    with opener.open(url, timeout=HTTP_TIMEOUT) as response:
+        body = response.read().decode("utf-8", errors="replace")
+        return response.status, body, (time.perf_counter() - started) * 1000
+
+
+def check_site():
+    import urllib.error
+
+    url = base_url()
+    try:
+        status, _body, elapsed_ms = _get(url)
+    except urllib.error.HTTPError as e:
+        return "fail", f"{url} answered HTTP {e.code}"
+    except OSError as e:
+        return "fail", f"{url} unreachable: {e}"
+    return "ok", f"{url} answered HTTP {status} in {elapsed_ms:.0f} ms"
+
+
+def check_session():
+    from http.cookiejar import CookieJar
+
+    from cookie_store import CookieStore
+    from page_analysis import login_required
+
+    configured = accounts()
+    if not configured:
+        return "warn", "no account configured"
+
+    results = []
+    for account in configured:
+        cookies = CookieJar()
+        if not CookieStore.from_env(account["email"]).load_into(cookies):
+            results.append(("warn", f"{account['email']}: no saved session"))
+            continue
+        try:
+            _status, body, _elapsed_ms = _get(base_url(), cookies)
+        except OSError as e:
+            return "fail", f"could not validate the session: {e}"
+        if login_required(body):
+            results.append(("warn", f"{account['email']}: saved session expired"))
+        else:
+            results.append(("ok", f"{account['email']}: logged in"))
+
+    status = "ok" if all(status == "ok" for status, _ in results) else "warn"
+    return status, "; ".join(detail for _status, detail in results)
+
+
+CHECKS = {
+    "imports": check_imports,
+    "config": check_config,
+    "browser": check_browser,
+    "system_browsers": check_system_browsers,
+    "site": check_site,
+    "session": check_session,
+}
+
+
+def _fingerprint():
+    values = [os.getenv(name, "") for name in CONFIG_VARS]
+    for path in (".env", os.getenv("ACCOUNTS_FILE") or ""):
+        values.append(str(os.path.getmtime(path)) if os.path.exists(path) else "")
+    return hashlib.sha256("\0".join(values).encode()).hexdigest()[:16]
+
+
+class HealthCache:
+    """Passed probe results, valid for `ttl` seconds and one configuration"""
+
+    def __init__(self, path=".health_check.json", ttl=300):
+        self.path = path
+        self.ttl = ttl
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.getenv("HEALTH_CHECK_FILE", ".health_check.json"),
+            ttl=float(os.getenv("HEALTH_CHECK_TTL", "300")),
+        )
+
+    def load(self, fingerprint):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if cached.get("fingerprint") != fingerprint:
+            return {}
+        now = time.time()
+        return {
+            name: result
+            for name, result in cached.get("results", {}).items()
+            if now - result["checked_at"] < self.ttl
+        }
+
+    def save(self, fingerprint, results):
+        passed = self.load(fingerprint)
+        for name, result in results.items():
+            if result.get("cached"):
+                continue
+            if result["status"] == "ok":
+                passed[name] = result
+            else:
+                passed.pop(name, None)
+        try:
+            with atomic_write(self.path) as f:
+                json.dump({"fingerprint": fingerprint, "results": passed}, f)
+        except OSError as e:
+            logging.warning(f"Could not cache health check results: {e}")
+
+
+def _in_thread(check):
+    """Run a blocking probe in a daemon thread, returning a future of its result
+
+    Unlike the default executor, asyncio.run does not wait for a probe that
+    is still hanging after PROBE_TIMEOUT, so the timeout bounds the check.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def resolve(outcome, error):
+        if future.done():
+            return
+        if error:
+            future.set_exception(error)
+        else:
+            future.set_result(outcome)
+
+    def run():
+        try:
+            outcome, error = check(), None
+        except Exception as e:
+            outcome, error = None, e
+        try:
+            loop.call_soon_threadsafe(resolve, outcome, error)
+        except RuntimeError:
+            # The loop closed after the probe timed out
+            pass
+
+    threading.Thread(target=run, name=f"probe-{check.__name__}", daemon=True).start()
+    return future
+
+
+async def _probe(check):
+    started = time.perf_counter()
+    try:
+        if inspect.iscoroutinefunction(check):
+            outcome = check()
+        else:
+            outcome = _in_thread(check)
+        status, detail = await asyncio.wait_for(outcome, PROBE_TIMEOUT)
+    except asyncio.TimeoutError:
+        status, detail = "fail", f"no answer within {PROBE_TIMEOUT} s"
+    except Exception as e:
+        status, detail = "fail", str(e) or type(e).__name__
+    return {
+        "status": status,
+        "detail": detail,
+        "ms": (time.perf_counter() - started) * 1000,
+        "checked_at": time.time(),
+    }
+
+
+async def run_checks(names=None, fresh=False, cache=None):
+    """Run the probes `names` (default all) concurrently, returning their results"""
+    load_config()
+    names = names or list(CHECKS)
+    cache = cache or HealthCache.from_env()
+    fingerprint = _fingerprint()
+
+    results = {}
+    if not fresh:
+        for name, result in cache.load(fingerprint).items():
+            if name in names:
+                results[name] = dict(result, cached=True)
+
+    pending = [name for name in names if name not in results]
+    for name, result in zip(
+        pending, await asyncio.gather(*(_probe(CHECKS[name]) for name in pending))
+    ):
+        results[name] = result
+
+    cache.save(fingerprint, results)
+    return {name: results[name] for name in names}
+
+
+def main(names=None, fresh=False):
+    """Print the health check results, returning whether nothing failed"""
+    started = time.perf_counter()
+    print("🔍 DevScout health check")
+    results = asyncio.run(run_checks(names, fresh))
+
+    for name, result in results.items():
+        timing = "cached" if result.get("cached") else f"{result['ms']:.0f} ms"
+        print(
+            f"{ICONS[result['status']]} {name:<16}{timing:>9}  {result['detail']}"
+        )
+
+    cached = sum(1 for result in results.values() if result.get("cached"))
+    print(
+        f"Finished in {(time.perf_counter() - started) * 1000:.0f} ms"
+        f"{f' ({cached} cached)' if cached else ''}"
+    )
+    return all(result["status"] != "fail" for result in results.values())
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(0 if main(fresh="--fresh" in sys.argv) else 1)
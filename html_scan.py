@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Streaming, targeted HTML scanning for the requests engine
+
+Instead of building a full BeautifulSoup tree, `scan_response` feeds the
+response to an `html.parser` scanner chunk by chunk. The scanner only
+records what the automation looks for (forms, procurar/enviar buttons,
+the CSRF token, inline scripts mentioning vagas and script bundles) and
+the download stops as soon as every target of one of the `STOP_WHEN`
+groups has been found, so memory and CPU stay flat as the page grows.
+The enviar form is not one of those targets: a scan that stopped early
+(`complete` is False) may not have reached it, and the enviar analysis
+needs the whole page.
+"""
+
+import logging
+import re
+from html.parser import HTMLParser
+
+PROCURAR_TEXT = re.compile(r"procurar\s*vagas", re.IGNORECASE)
+ENVIAR_TEXT = re.compile(r"enviar\s+automaticamente", re.IGNORECASE)
+LOGIN_PROMPTS = ("Cadastrar / Login", "Entrar com Google")
+# Characters of one chunk kept to find a prompt split across two chunks
+PROMPT_OVERLAP = max(len(prompt) for prompt in LOGIN_PROMPTS) - 1
+API_PATTERN = re.compile(r'["\']([^"\']*(?:procurar|vagas|search)[^"\']*)["\']')
+CSRF_INPUTS = ("csrf_token", "_token")
+MAX_FORM_TEXT = 2000
+
+# The scan is complete once every target of one group was found
+STOP_WHEN = (
+    # Logged out: all the login needs
+    ("login_prompt", "csrf_token"),
+    # Logged in: all the vagas analysis needs
+    ("procurar_button", "api_endpoint"),
+)
+
+
+class PageScan(HTMLParser):
+    """Collects the targeted elements of one page"""
+
+    def __init__(self, stop_when=STOP_WHEN):
+        super().__init__(convert_charrefs=True)
+        self.stop_when = stop_when
+        self.login_prompt = False
+        self.csrf_token = None
+        self.procurar_button = None
+        self.enviar_button = None
+        self.api_endpoint = None
+        self.forms = []
+        self.script_srcs = []
+        self.chars_read = 0
+        self._prompt_tail = ""
+        self.complete = False
+        # Where the scanned page came from, set by scan_response
+        self.url = None
+        self._button = None
+        self._form = None
+        self._script = None
+
+    @property
+    def done(self):
+        return any(
+            all(getattr(self, target) for target in group) for group in self.stop_when
+        )
+
+    def feed(self, data):
+        self.chars_read += len(data)
+        if not self.login_prompt:
+            # The raw HTML, scripts included, like page_analysis.login_required
+            text = self._prompt_tail + data
+            self.login_prompt = any(prompt in text for prompt in LOGIN_PROMPTS)
+            self._prompt_tail = text[-PROMPT_OVERLAP:]
+        super().feed(data)
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in ("button", "a"):
+            self._button = []
+        elif tag == "form":
+            self._form = {
+                "action": attrs.get("action", ""),
+                "method": attrs.get("method", "POST"),
+                "text": "",
+                "inputs": {},
+            }
+        elif tag == "script":
+            if attrs.get("src"):
+                self.script_srcs.append(attrs["src"])
+            else:
+                self._script = []
+        elif tag == "meta" and attrs.get("name") == "csrf-token":
+            self.csrf_token = self.csrf_token or attrs.get("content")
+
+        if tag == "input":
+            name = attrs.get("name")
+            if name in CSRF_INPUTS and attrs.get("value"):
+                self.csrf_token = self.csrf_token or attrs["value"]
+            if name and self._form is not None:
+                self._form["inputs"][name] = attrs.get("value", "")
+
+    def handle_endtag(self, tag):
+        if tag in ("button", "a") and self._button is not None:
+            text = " ".join("".join(self._button).split())
+            if not self.procurar_button and PROCURAR_TEXT.search(text):
+                self.procurar_button = text
+            if not self.enviar_button and ENVIAR_TEXT.search(text):
+                self.enviar_button = text
+            self._button = None
+        elif tag == "form" and self._form is not None:
+            self.forms.append(self._form)
+            self._form = None
+        elif tag == "script" and self._script is not None:
+            text = "".join(self._script)
+            if not self.api_endpoint and ("procurar" in text or "vagas" in text):
+                match = API_PATTERN.search(text)
+                if match:
+                    self.api_endpoint = match.group(1)
+            self._script = None
+
+    def handle_data(self, data):
+        if self._script is not None:
+            self._script.append(data)
+            return
+        if self._button is not None:
+            self._button.append(data)
+        if self._form is not None and len(self._form["text"]) < MAX_FORM_TEXT:
+            self._form["text"] += data
+
+
+def scan_text(html_content, stop_when=STOP_WHEN):
+    """Scan an HTML string that is already in memory"""
+    scan = PageScan(stop_when)
+    scan.feed(html_content)
+    scan.close()
+    scan.complete = True
+    return scan
+
+
+def scan_response(response, stop_when=STOP_WHEN, chunk_size=16 * 1024):
+    """Scan a `requests` response fetched with `stream=True`
+
+    Stops reading (and closes the connection) once the scan is done.
+    """
+    scan = PageScan(stop_when)
+    scan.url = response.url
+    # Without a declared charset iter_content would yield bytes
+    response.encoding = response.encoding or "utf-8"
+    try:
+        for chunk in response.iter_content(chunk_size, decode_unicode=True):
+            scan.feed(chunk)
+            if scan.done:
+                break
+        else:
+            scan.close()
+            scan.complete = True
+    finally:
+        response.close()
+
+    logging.info(
+        f"Scanned {scan.chars_read} characters of {response.url}"
+        f"{'' if scan.complete else ' (stopped early)'}"
+    )
+    return scan
+
+
+def procurar_analysis(scan):
+    """`simulate_procurar_vagas` results from a scan"""
+    vagas_form = None
+    api_endpoint = None
+    for form in scan.forms:
+        form_text = form["text"].lower()
+        if "vaga" in form_text or "job" in form_text or "search" in form_text:
+            vagas_form = form
+            action = form["action"]
+            if "search" in action or "vaga" in action:
+                api_endpoint = action
+                break
+
+    return {
+        "button_found": bool(scan.procurar_button),
+        "form_found": bool(vagas_form),
+        "api_endpoint": scan.api_endpoint or api_endpoint,
+        "button_info": scan.procurar_button,
+        "form_action": vagas_form["action"] if vagas_form else None,
+    }
+
+
+def enviar_analysis(scan):
+    """`simulate_enviar_automaticamente` results from a scan"""
+    for form in scan.forms:
+        form_text = form["text"].lower()
+        if "automatic" in form_text or "enviar" in form_text:
+            action = form["action"]
+            if "apply" in action or "send" in action:
+                return {
+                    "found": True,
+                    "method": form["method"],
+                    "action": action,
+                    "form_data": dict(form["inputs"]),
+                }
+
+    if scan.enviar_button:
+        return {
+            "found": True,
+            "button_text": scan.enviar_button,
+            "button_info": scan.enviar_button,
+        }
+    return {"found": False}
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Conditional-request cache and transfer accounting for the requests engine
+
+GET responses carrying an ETag or Last-Modified are stored on disk; the
+next run sends If-None-Match / If-Modified-Since and gets a 304 with an
+empty body when nothing changed, which is served from the cache.
+
+Compression needs no setup: requests advertises every codec urllib3 can
+decode, and the `urllib3[brotli,zstd]` dependency adds brotli and zstd to
+gzip and deflate. Each request's Content-Encoding is recorded.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+
+from storage import atomic_write
+
+
+def _wire_bytes(response):
+    """Bytes received for the body before decompression, if known"""
+    try:
+        return response.raw.tell()
+    except (AttributeError, OSError, ValueError):
+        return len(response.content)
+
+
+class HttpCache:
+    """On-disk cache of validated GET responses, one namespace per account"""
+
+    def __init__(self, directory=".http_cache", namespace=""):
+        self.directory = directory
+        self.namespace = namespace
+        self.requests = []
+
+    @classmethod
+    def from_env(cls, namespace=""):
+        return cls(os.getenv("HTTP_CACHE_DIR", ".http_cache"), namespace)
+
+    def _path(self, url):
+        key = hashlib.sha256(f"{self.namespace}\n{url}".encode()).hexdigest()
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _load(self, url):
+        try:
+            with open(self._path(url), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable cache entry for {url}: {e}")
+            return None
+
+    def _store(self, url, response):
+        if "no-store" in response.headers.get("Cache-Control", ""):
+            return
+        entry = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "encoding": response.encoding,
+            "body": response.text,
+        }
+        if not entry["etag"] and not entry["last_modified"]:
+            return
+
+        try:
+            with atomic_write(self._path(url)) as f:
+                json.dump(entry, f)
+        except OSError as e:
+            logging.warning(f"Could not cache {url}: {e}")
+
+    def get(self, session, url, **kwargs):
+        """GET `url`, revalidating a cached copy
+
+        A 304 is turned into a 200 whose text is the cached body; such
+        responses have `from_cache` set to True.
+        """
+        entry = self._load(url)
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        started = time.perf_counter()
+        response = session.get(url, headers=headers, **kwargs)
+        # Reading the body is part of the transfer time
+        body_bytes = len(response.content)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        response.from_cache = False
+        if response.status_code == 304 and entry:
+            response.status_code = 200
+            response.encoding = entry["encoding"] or "utf-8"
+            response._content = entry["body"].encode(response.encoding)
+            response.from_cache = True
+        elif response.status_code == 200:
+            self._store(url, response)
+
+        self.requests.append(
+            {
+                "url": url,
+                "status": 304 if response.from_cache else response.status_code,
+                "wire_bytes": _wire_bytes(response) if not response.from_cache else 0,
+                "body_bytes": body_bytes,
+                "encoding": response.headers.get("Content-Encoding", "identity"),
+                "elapsed_ms": round(elapsed_ms, 1),
+            }
+        )
+        return response
+
+    def report(self):
+        """Log bytes and time spent per request made through the cache"""
+        for entry in self.requests:
+            logging.info(
+                f"GET {entry['url']}: HTTP {entry['status']}, "
+                f"{entry['wire_bytes']} bytes transferred "
+                f"({entry['encoding']}, {entry['body_bytes']} decoded), "
+                f"{entry['elapsed_ms']:.0f} ms",
+                extra={"http_transfer": entry},
+            )
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Durable job queue for account runs, backed by SQLite
+
+The scheduler enqueues one job per account and day; any number of
+workers, on this host or on others sharing the database file, lease jobs
+from it. A lease expires unless renewed, so the job of a dead worker is
+picked up again, and failed jobs are retried with exponential backoff
+until `max_attempts`. The dedup key makes enqueueing the same run twice
+a no-op, so an account is never applied for twice on the same day.
+
+Several hosts need the database on a filesystem with working POSIX
+locks (a local disk, or NFSv4 with locking; not SMB or Dropbox), which
+is why it uses the rollback journal and not WAL (see storage.py).
+"""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+
+from storage import connect, transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    dedup_key TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    available_at REAL NOT NULL,
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (state, available_at);
+"""
+
+
+def worker_id():
+    """Identifies this worker process in leases, e.g. `host:1234`"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobQueue:
+    """Jobs move through queued -> leased -> done | dead"""
+
+    def __init__(self, path, lease_seconds=300, max_attempts=3, retry_delay=60):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._db = connect(path)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls):
+        """The queue in QUEUE_DB, or None when no queue is configured"""
+        path = os.getenv("QUEUE_DB")
+        if not path:
+            return None
+        return cls(
+            path,
+            lease_seconds=float(os.getenv("QUEUE_LEASE_SECONDS", "300")),
+            max_attempts=int(os.getenv("QUEUE_MAX_ATTEMPTS", "3")),
+            retry_delay=float(os.getenv("QUEUE_RETRY_DELAY_SECONDS", "60")),
+        )
+
+    def _write(self, sql, params=()):
+        """Run a single (atomic) write, returning the cursor"""
+        return self._db.execute(sql, params)
+
+    def enqueue(self, payload, dedup_key, delay=0):
+        """Add a job unless one with `dedup_key` exists; returns its id or None"""
+        now = time.time()
+        cursor = self._write(
+            "INSERT OR IGNORE INTO jobs "
+            "(dedup_key, payload, max_attempts, available_at, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (dedup_key, json.dumps(payload), self.max_attempts, now + delay, now, now),
+        )
+        if not cursor.rowcount:
+            logging.info(f"Job {dedup_key} already queued, skipping")
+            return None
+        logging.info(f"Queued job {dedup_key}")
+        return cursor.lastrowid
+
+    def lease(self, owner):
+        """Claim the next ready job for `owner`, or return None
+
+        Queued jobs and jobs whose lease expired are both ready. The
+        immediate transaction takes the write lock before reading, so two
+        workers never lease the same job.
+        """
+        now = time.time()
+        with transaction(self._db) as db:
+            row = db.execute(
+                "SELECT * FROM jobs WHERE "
+                "(state = 'queued' AND available_at <= ?) "
+                "OR (state = 'leased' AND lease_expires < ?) "
+                "ORDER BY available_at, id LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if row is None:
+                return None
+            if row["state"] == "leased":
+                logging.warning(
+                    f"Lease of job {row['dedup_key']} by {row['lease_owner']} "
+                    f"expired, taking it over"
+                )
+                if row["attempts"] >= row["max_attempts"]:
+                    # Its workers keep dying, e.g. the browser is OOM-killed
+                    db.execute(
+                        "UPDATE jobs SET state = 'dead', lease_owner = NULL, "
+                        "lease_expires = NULL, updated_at = ? WHERE id = ?",
+                        (now, row["id"]),
+                    )
+                    logging.error(
+                        f"Job {row['dedup_key']} gave up after expired leases"
+                    )
+                    return None
+            db.execute(
+                "UPDATE jobs SET state = 'leased', attempts = attempts + 1, "
+                "lease_owner = ?, lease_expires = ?, updated_at = ? WHERE id = ?",
+                (owner, now + self.lease_seconds, now, row["id"]),
+            )
+
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["attempts"] += 1
+        return job
+
+    def renew(self, job_id, owner):
+        """Extend a lease; False if `owner` no longer holds it"""
+        now = time.time()
+        cursor = self._write(
+            "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+            "WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+            (now + self.lease_seconds, now, job_id, owner),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id, owner, result=None):
+        """Mark a leased job done"""
+        cursor = self._write(
+            "UPDATE jobs SET state = 'done', result = ?, lease_owner = NULL, "
+            "lease_expires = NULL, updated_at = ? "
+            "WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+            (json.dumps(result), time.time(), job_id, owner),
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id, owner, error):
+        """Requeue a failed job with backoff, or mark it dead after max attempts"""
+        now = time.time()
+        with transaction(self._db) as db:
+            row = db.execute(
+                "SELECT attempts, max_attempts, dedup_key FROM jobs "
+                "WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+                (job_id, owner),
+            ).fetchone()
+            if row is None:
+                return False
+
+            if row["attempts"] >= row["max_attempts"]:
+                state, available_at = "dead", now
+                logging.error(
+                    f"Job {row['dedup_key']} failed {row['attempts']} times, giving up"
+                )
+            else:
+                state = "queued"
+                available_at = now + self.retry_delay * 2 ** (row["attempts"] - 1)
+                logging.warning(
+                    f"Job {row['dedup_key']} failed, retrying in "
+                    f"{available_at - now:.0f}s"
+                )
+            db.execute(
+                "UPDATE jobs SET state = ?, available_at = ?, result = ?, "
+                "lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ?",
+                (state, available_at, json.dumps({"error": error}), now, job_id),
+            )
+        return True
+
+    def counts(self):
+        """Number of jobs per state"""
+        rows = self._db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state")
+        return {state: count for state, count in rows}
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Named browser launch profiles tuned for startup time and memory
+
+Every launch records its measured launch time and browser memory so the
+cheapest profile that still completes the flow can be picked with
+LAUNCH_PROFILE=auto.
+"""
+
+import json
+import logging
+import os
+import statistics
+import time
+from datetime import datetime
+
+from process_tree import format_bytes, tree_rss_bytes_async
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
+)
+
+BASE_ARGS = [
+    "--no-sandbox",
+    "--disable-blink-features=AutomationControlled",
+    "--disable-dev-shm-usage",
+]
+
+LEAN_CHROMIUM_ARGS = BASE_ARGS + [
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-background-timer-throttling",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--metrics-recording-only",
+    "--mute-audio",
+    "--no-first-run",
+]
+
+LEAN_CONTEXT = {
+    "user_agent": DEFAULT_USER_AGENT,
+    "viewport": {"width": 800, "height": 600},
+    "service_workers": "block",
+    "reduced_motion": "reduce",
+}
+
+# Resource types that never matter for the automation flow
+LEAN_BLOCKED_RESOURCES = ["image", "media", "font"]
+
+LAUNCH_PROFILES = {
+    "default": {
+        "description": "WebKit with the original launch arguments",
+        "browser": "webkit",
+        "launch": {"args": BASE_ARGS},
+        "context": {"user_agent": DEFAULT_USER_AGENT},
+    },
+    "lean": {
+        "description": "WebKit, small viewport, no service workers or media",
+        "browser": "webkit",
+        "launch": {"args": BASE_ARGS},
+        "context": LEAN_CONTEXT,
+        "block_resources": LEAN_BLOCKED_RESOURCES,
+    },
+    "lean-nojs": {
+        "description": "Lean WebKit with JavaScript disabled (JS-light mode)",
+        "browser": "webkit",
+        "launch": {"args": BASE_ARGS},
+        "context": dict(LEAN_CONTEXT, java_script_enabled=False),
+        "block_resources": LEAN_BLOCKED_RESOURCES,
+    },
+    "chromium-shell": {
+        "description": "Chromium headless shell with GPU, extensions and "
+        "background networking disabled",
+        "browser": "chromium",
+        "launch": {"args": LEAN_CHROMIUM_ARGS},
+        "context": LEAN_CONTEXT,
+        "block_resources": LEAN_BLOCKED_RESOURCES,
+    },
+    "chromium-new-headless": {
+        "description": "Chromium new headless mode with the lean arguments",
+        "browser": "chromium",
+        "launch": {"channel": "chromium", "args": LEAN_CHROMIUM_ARGS},
+        "context": LEAN_CONTEXT,
+        "block_resources": LEAN_BLOCKED_RESOURCES,
+    },
+}
+
+DEFAULT_STATS_FILE = "launch_profile_stats.jsonl"
+
+
+def stats_path(stats_file=None):
+    """Where launch measurements are recorded (PROFILE_STATS_FILE)"""
+    return stats_file or os.getenv("PROFILE_STATS_FILE", DEFAULT_STATS_FILE)
+
+
+def get_launch_profile(name):
+    """Return the launch profile called `name`"""
+    if name not in LAUNCH_PROFILES:
+        raise ValueError(
+            f"Unknown launch profile '{name}', "
+            f"expected one of: {', '.join(LAUNCH_PROFILES)}"
+        )
+    return LAUNCH_PROFILES[name]
+
+
+def resolve_profile_name(name, stats_file=None):
+    """Resolve a configured profile name, picking the cheapest one for 'auto'"""
+    name = (name or "default").strip().lower()
+    if name != "auto":
+        get_launch_profile(name)
+        return name
+
+    cheapest = cheapest_profile(summarize_profile_stats(stats_file))
+    if cheapest:
+        logging.info(f"Auto-selected launch profile: {cheapest}")
+        return cheapest
+
+    logging.info("No launch profile measurements yet, using 'default'")
+    return "default"
+
+
+async def launch_profile(
+    playwright, name, headless=True, persistent=None, storage_state=None
+):
+    """Launch a browser and context with a profile, measuring cost
+
+    With a `persistent` user-data directory (see persistent_profile.py) the
+    context is opened on it and the returned browser may be None. Its
+    resources are not blocked: blocking routes every request, and
+    Playwright does not use the HTTP cache of a context with routes, which
+    is what the persistent directory is for.
+    Returns (browser, context, metrics).
+    """
+    profile = get_launch_profile(name)
+    started = time.perf_counter()
+
+    browser_type = getattr(playwright, profile["browser"])
+    if persistent:
+        context = await persistent.launch(browser_type, profile, headless=headless)
+        if profile.get("block_resources"):
+            logging.info(
+                f"Not blocking resources of '{name}' on the persistent profile"
+            )
+        browser = context.browser
+    else:
+        browser = await browser_type.launch(headless=headless, **profile["launch"])
+        context = await new_profile_context(browser, name, storage_state)
+
+    metrics = {
+        "profile": name,
+        "persistent": bool(persistent),
+        "launch_ms": (time.perf_counter() - started) * 1000,
+        "rss_bytes": await tree_rss_bytes_async(),
+    }
+    logging.info(
+        f"Launched profile '{name}' in {metrics['launch_ms']:.0f} ms "
+        f"({format_bytes(metrics['rss_bytes'])} browser memory)"
+    )
+    return browser, context, metrics
+
+
+async def new_profile_context(browser, name, storage_state=None):
+    """Open a new context on `browser` with a profile's context settings"""
+    profile = get_launch_profile(name)
+    options = dict(profile["context"])
+    if storage_state:
+        options["storage_state"] = storage_state
+    context = await browser.new_context(**options)
+    await apply_resource_blocking(context, profile)
+    return context
+
+
+async def apply_resource_blocking(context, profile):
+    """Abort requests for resource types the profile does not need"""
+    blocked = set(profile.get("block_resources") or [])
+    if not blocked:
+        return
+
+    async def block(route):
+        if route.request.resource_type in blocked:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await context.route("**/*", block)
+
+
+def record_profile_run(metrics, completed, stats_file=None):
+    """Append one launch measurement and its flow outcome to the stats file"""
+    if not metrics:
+        return
+
+    entry = dict(metrics, completed=bool(completed), at=datetime.now().isoformat())
+    try:
+        with open(stats_path(stats_file), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        logging.warning(f"Could not record launch profile stats: {e}")
+
+
+def summarize_profile_stats(stats_file=None):
+    """Aggregate recorded runs per profile"""
+    runs = {}
+    try:
+        with open(stats_path(stats_file), encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                runs.setdefault(entry.get("profile"), []).append(entry)
+    except FileNotFoundError:
+        return {}
+
+    summary = {}
+    for name, entries in runs.items():
+        if name not in LAUNCH_PROFILES:
+            continue
+        rss = [e["rss_bytes"] for e in entries if e.get("rss_bytes") is not None]
+        completed = sum(1 for e in entries if e.get("completed"))
+        summary[name] = {
+            "runs": len(entries),
+            "completed": completed,
+            "completion_rate": completed / len(entries),
+            "median_launch_ms": statistics.median(e["launch_ms"] for e in entries),
+            "median_rss_bytes": statistics.median(rss) if rss else None,
+        }
+
+    return summary
+
+
+def cheapest_profile(summary, min_completion_rate=0.9):
+    """Name of the lowest-memory, fastest profile that completes the flow"""
+    candidates = []
+    for name, stats in summary.items():
+        if stats["completion_rate"] < min_completion_rate:
+            continue
+        rss = stats["median_rss_bytes"]
+        candidates.append(
+            (rss if rss is not None else float("inf"), stats["median_launch_ms"], name)
+        )
+    if not candidates:
+        return None
+    return min(candidates)[2]
+
+
+def print_profile_summary(stats_file=None):
+    """Print a table of the recorded profile measurements"""
+    summary = summarize_profile_stats(stats_file)
+    if not summary:
+        print("No launch profile measurements recorded yet")
+        return
+
+    print(f"{'profile':<24}{'runs':>6}{'done':>8}{'launch':>10}{'memory':>12}")
+    for name, stats in sorted(summary.items()):
+        print(
+            f"{name:<24}{stats['runs']:>6}{stats['completion_rate']:>8.0%}"
+            f"{stats['median_launch_ms']:>8.0f}ms"
+            f"{format_bytes(stats['median_rss_bytes']):>12}"
+        )
+
+    cheapest = cheapest_profile(summary)
+    if cheapest:
+        print(f"\nCheapest profile that completes the flow: {cheapest}")
+
+
+async def benchmark_launch(names=None, runs=1, headless=True):
+    """Launch and close each profile `runs` times, returning the metrics
+
+    Only the launch is measured here; use the flow benchmark to find out
+    whether a profile completes the automation.
+    """
+    from browser_lifecycle import managed_playwright
+
+    results = []
+    async with managed_playwright() as playwright:
+        for name in names or list(LAUNCH_PROFILES):
+            for _ in range(runs):
+                try:
+                    browser, context, metrics = await launch_profile(
+                        playwright, name, headless=headless
+                    )
+                except Exception as e:
+                    logging.error(f"Profile '{name}' failed to launch: {e}")
+                    results.append({"profile": name, "error": str(e)})
+                    continue
+                await context.close()
+                await browser.close()
+                results.append(metrics)
+
+    return results
+
+
+if __name__ == "__main__":
+    from config import load_config
+
+    load_config()
+    print_profile_summary()
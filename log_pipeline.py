@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Non-blocking, queue-based logging pipeline
+
+Log calls only put the record on an in-memory queue; a background
+listener thread formats it and writes to the console and a rotating log
+file, so disk and console I/O never run on the asyncio event loop.
+Large payload fields are sampled and truncated before they are queued.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+from datetime import datetime
+
+# Attributes every LogRecord has; anything else was passed via `extra=`
+_RECORD_ATTRIBUTES = set(
+    logging.LogRecord("", 0, "", 0, "", (), None).__dict__
+) | {"message", "asctime"}
+
+_listener = None
+
+
+def _truncate(value, limit):
+    text = value if isinstance(value, str) else str(value)
+    if limit and len(text) > limit:
+        return f"{text[:limit]}... [{len(text) - limit} chars truncated]"
+    return text
+
+
+def _extra_fields(record):
+    return {
+        key: value
+        for key, value in record.__dict__.items()
+        if key not in _RECORD_ATTRIBUTES and not key.startswith("_")
+    }
+
+
+class PayloadFilter(logging.Filter):
+    """Truncates large messages and samples records carrying a `payload`
+
+    Runs in the caller's thread before the record is queued, so the
+    formatting cost of a huge message is paid at most once and dropped
+    payloads are never formatted at all.
+    """
+
+    def __init__(self, max_chars=500, payload_sample_rate=1.0):
+        super().__init__()
+        self.max_chars = max_chars
+        self.payload_sample_rate = payload_sample_rate
+
+    def filter(self, record):
+        if hasattr(record, "payload"):
+            if random.random() >= self.payload_sample_rate:
+                del record.payload
+            else:
+                record.payload = _truncate(record.payload, self.max_chars)
+
+        message = record.getMessage()
+        if self.max_chars and len(message) > self.max_chars:
+            record.msg = _truncate(message, self.max_chars)
+            record.args = None
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any `extra=` fields"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(_extra_fields(record))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """The classic text format, with `extra=` fields appended"""
+
+    def format(self, record):
+        text = super().format(record)
+        extra = _extra_fields(record)
+        if extra:
+            text += " | " + " ".join(f"{key}={value}" for key, value in extra.items())
+        return text
+
+
+def _payload_filter():
+    return PayloadFilter(
+        max_chars=int(os.getenv("LOG_MAX_FIELD_CHARS", "500")),
+        payload_sample_rate=float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.1")),
+    )
+
+
+def _file_handler(log_file):
+    rotate = os.getenv("LOG_ROTATE", "size").lower()
+    backups = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+
+    if rotate == "time":
+        return logging.handlers.TimedRotatingFileHandler(
+            log_file,
+            when=os.getenv("LOG_ROTATE_WHEN", "midnight"),
+            backupCount=backups,
+            encoding="utf-8",
+        )
+    if rotate == "size":
+        return logging.handlers.RotatingFileHandler(
+            log_file,
+            maxBytes=int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+            backupCount=backups,
+            encoding="utf-8",
+        )
+    return logging.FileHandler(log_file, encoding="utf-8")
+
+
+def start(log_file, level, text_format):
+    """Route the root logger through a queue to a background writer"""
+    global _listener
+    if _listener:
+        return _listener
+
+    if os.getenv("LOG_FORMAT", "text").lower() == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = TextFormatter(text_format)
+
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(_file_handler(log_file))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(_payload_filter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(stop)
+    return _listener
+
+
+class _ForwardHandler(logging.Handler):
+    """Hands records from another process to this process's loggers"""
+
+    def emit(self, record):
+        logging.getLogger(record.name).handle(record)
+
+
+def forward_from(process_queue):
+    """Log records that worker processes put on `process_queue`
+
+    Returns the listener; call `stop()` on it when the workers are gone.
+    """
+    listener = logging.handlers.QueueListener(process_queue, _ForwardHandler())
+    listener.start()
+    return listener
+
+
+def attach_to(process_queue, level=logging.INFO):
+    """In a worker process, send every log record to the parent's queue"""
+    queue_handler = logging.handlers.QueueHandler(process_queue)
+    queue_handler.addFilter(_payload_filter())
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level)
+
+
+def stop():
+    """Flush queued records and stop the background writer"""
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
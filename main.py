@@ -1,332 +1,211 @@
 import asyncio
 import logging
 import os
-from playwright.async_api import async_playwright
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler("devscout.log"), logging.StreamHandler()],
-)
+from artifacts import FailureArtifacts
+from browser_backends import ProfileBackend
+from browser_lifecycle import BrowserResources, LeakDetector, managed_playwright
+from checkpoints import CheckpointStore
+from config import base_url, load_config, setup
+from devscout_flow import devscout_steps, is_logged_in
+from flow_engine import FlowRunner
+from memory_governor import MemoryGovernor
+from rate_limiter import install_on_context, shared_limiter
+from route_memory import RouteMemory
+from selector_stats import SelectorStats
 
 
 class DevScoutAutomation:
-    def __init__(self):
-        self.email = os.getenv("EMAIL")
-        self.password = os.getenv("PASSWORD")
-        self.headless = os.getenv("HEADLESS", "true").lower() == "true"
-        self.base_url = "https://devscout.app"
-
+    def __init__(self, backend=None, email=None, password=None):
+        load_config()
+        # Defaults to the account in EMAIL/PASSWORD, see config.accounts()
+        self.email = email or os.getenv("EMAIL")
+        self.password = password or os.getenv("PASSWORD")
         if not self.email or not self.password:
             raise ValueError("EMAIL and PASSWORD must be set in environment variables")
 
-    async def setup_browser(self):
-        """Initialize browser context"""
-        self.playwright = await async_playwright().start()
-
-        browser_options = {
-            "headless": self.headless,
-            "args": [
-                "--no-sandbox",
-                "--disable-blink-features=AutomationControlled",
-                "--disable-dev-shm-usage",
-            ],
-        }
-
-        self.browser = await self.playwright.webkit.launch(**browser_options)
-        self.context = await self.browser.new_context(
-            user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
+        self.headless = os.getenv("HEADLESS", "true").lower() == "true"
+        self.base_url = base_url()
+        # Which browser is launched, and how, see browser_backends.py
+        self.backend = backend or ProfileBackend.from_env(self.email)
+        self.resources = BrowserResources()
+        self.leak_detector = LeakDetector()
+        self.governor = MemoryGovernor.from_env()
+        # Shared with every other engine running in this process
+        self.rate_limiter = shared_limiter()
+        self.run_attempts = max(1, int(os.getenv("RUN_ATTEMPTS", "2")))
+        # Screenshot, DOM and trace of failed steps, see artifacts.py
+        self.artifacts = FailureArtifacts.from_env()
+
+        self.checkpoints = CheckpointStore.from_env(self.email)
+        # Learned deep link to the vagas modal, see route_memory.py
+        self.route_memory = RouteMemory.from_env(self.base_url)
+        self.steps = devscout_steps(self.base_url, route_memory=self.route_memory)
+        self.flow = FlowRunner(
+            variables={"email": self.email, "password": self.password},
+            on_page_change=self._switch_page,
+            selector_stats=SelectorStats.from_env(),
+            on_failure=self._step_failed,
         )
-        self.page = await self.context.new_page()
-
-        logging.info("Browser setup completed")
-
-    async def navigate_to_site(self):
-        """Navigate to DevScout website"""
-        try:
-            logging.info(f"Navigating to {self.base_url}")
-            await self.page.goto(self.base_url, wait_until="domcontentloaded")
-            await self.page.wait_for_timeout(2000)  # Allow page to load
-            logging.info("Successfully navigated to DevScout")
-            return True
-        except Exception as e:
-            logging.error(f"Failed to navigate to DevScout: {e}")
-            return False
-
-    async def check_login_status(self):
-        """Check if user is already logged in"""
-        try:
-            # Look for login/signup buttons - if present, user is not logged in
-            login_button = await self.page.query_selector('text="Cadastrar / Login"')
-            if login_button:
-                logging.info("User not logged in - login required")
-                return False
-            else:
-                logging.info("User appears to be logged in")
-                return True
-        except Exception as e:
-            logging.error(f"Error checking login status: {e}")
-            return False
-
-    async def login(self):
-        """Handle login process"""
-        try:
-            logging.info("Starting login process")
-
-            # Click login button
-            login_button = await self.page.wait_for_selector(
-                'text="Cadastrar / Login"', timeout=10000
-            )
-            await login_button.click()
-
-            # Wait for login form to appear
-            await self.page.wait_for_timeout(2000)
-
-            # Look for email input - try multiple selectors
-            email_input = await self.page.wait_for_selector(
-                'input[type="email"], input[name="email"], input[placeholder*="email"]',
-                timeout=10000,
-            )
-            await email_input.fill(self.email)
-
-            # Look for password input
-            password_input = await self.page.wait_for_selector(
-                'input[type="password"], input[name="password"]', timeout=10000
-            )
-            await password_input.fill(self.password)
-            await password_input.press("Enter")
-
-            # Try to find and click submit button first
-            # try:
-            #     submit_button = await self.page.wait_for_selector(
-            #         'button[type="submit"], button:has-text("Entrar"), button:has-text("Login")',
-            #         timeout=5000,
-            #     )
-            #     await submit_button.click()
-            #     logging.info("Clicked submit button")
-            # except:
-            #     # If button not found, use Enter key on password field
-            #     logging.info(
-            #         "Submit button not found, using Enter key on password field"
-            #     )
-                
-
-            # Wait for login to complete
-            await self.page.wait_for_timeout(3000)
-
-            # Check if login was successful
-            if await self.check_login_status():
-                logging.info("Login successful")
-                return True
-            else:
-                logging.error("Login failed")
-                return False
-
-        except Exception as e:
-            logging.error(f"Login error: {e}")
-            return False
-
-    async def _fallback_email_login(self):
-        """Fallback to email/password login if Google login not available"""
-        try:
-            logging.info("Attempting fallback to email/password login")
-
-            # Look for email input
-            email_input = await self.page.wait_for_selector(
-                'input[type="email"], input[name="email"], input[placeholder*="email"]',
-                timeout=10000,
-            )
-            await email_input.fill(self.email)
-
-            # Look for password input
-            password_input = await self.page.wait_for_selector(
-                'input[type="password"], input[name="password"]', timeout=10000
-            )
-            await password_input.fill(self.password)
-
-            # Click login/submit button
-            submit_button = await self.page.wait_for_selector(
-                'button[type="submit"], button:has-text("Entrar"), button:has-text("Login")',
-                timeout=10000,
-            )
-            await submit_button.click()
-
-            # Wait for login to complete
-            await self.page.wait_for_timeout(3000)
-
-            # Check if login was successful
-            if await self.check_login_status():
-                logging.info("Email login successful")
-                return True
-            else:
-                logging.error("Email login failed")
-                return False
-
-        except Exception as e:
-            logging.error(f"Fallback login error: {e}")
-            return False
-
-        except Exception as e:
-            logging.error(f"Login error: {e}")
-            return False
-
-    async def find_and_click_procurar_vagas(self):
-        """Find and click the 'procurar vagas' button"""
-        try:
-            logging.info("Looking for 'procurar vagas' button")
-
-            # Try multiple selectors to find the button
-            selectors = [
-                'button:has-text("procurar vagas")',
-                'button:has-text("Procurar Vagas")',
-                'button:has-text("PROCURAR VAGAS")',
-                '[data-testid*="procurar"]',
-                'a:has-text("procurar vagas")',
-            ]
-
-            button = None
-            for selector in selectors:
-                try:
-                    button = await self.page.wait_for_selector(selector, timeout=5000)
-                    if button:
-                        logging.info(f"Found button with selector: {selector}")
-                        break
-                except:
-                    continue
-
-            if not button:
-                logging.error("Could not find 'procurar vagas' button")
-                return False
-
-            await button.click()
-            logging.info("Clicked 'procurar vagas' button")
-            return True
 
-        except Exception as e:
-            logging.error(f"Error clicking 'procurar vagas' button: {e}")
-            return False
+    @property
+    def outputs(self):
+        """Outputs of completed steps, e.g. the vagas count"""
+        return self.flow.outputs
 
-    async def wait_for_modal_and_check_vagas(self):
-        """Wait for modal to appear and check vagas count"""
-        try:
-            logging.info("Waiting for modal to appear")
-
-            # Wait for modal - try multiple selectors
-            modal_selectors = [
-                '[role="dialog"]',
-                ".modal",
-                '[data-testid*="modal"]',
-                '[class*="modal"]',
-            ]
-
-            modal = None
-            for selector in modal_selectors:
-                try:
-                    modal = await self.page.wait_for_selector(selector, timeout=10000)
-                    if modal:
-                        logging.info(f"Found modal with selector: {selector}")
-                        break
-                except:
-                    continue
-
-            if not modal:
-                logging.error("Modal did not appear")
-                return False
+    async def setup_browser(self, storage_state=None):
+        """Initialize browser context"""
+        self.playwright = await self.resources.enter(managed_playwright())
+        await self._open_browser(storage_state)
 
-            # Wait a bit for content to load
-            await self.page.wait_for_timeout(2000)
+        logging.info(f"Browser setup completed ({self.backend.describe()})")
+        return True
 
-            # Look for vagas count
-            vagas_text = await self.page.inner_text("body")
-            logging.info(f"Modal content: {vagas_text[:200]}...")
+    async def _open_browser(self, storage_state=None):
+        """Launch the browser, context and page through the backend"""
+        self.browser, self.context = await self.backend.launch(
+            self.playwright, headless=self.headless, storage_state=storage_state
+        )
+        if self.browser:
+            await self.resources.adopt("browser", self.browser, self.browser.close)
+        await self._adopt_context()
+        # Lists processes with `ps`, off the event loop
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.leak_detector.track
+        )
 
-            # Check if we can find number of vagas
-            import re
+    async def _adopt_context(self):
+        context = self.context
 
-            vagas_numbers = re.findall(r"\d+", vagas_text)
-            if vagas_numbers:
-                logging.info(f"Found {vagas_numbers[0]} vagas")
-            else:
-                logging.info("Could not find specific vagas count, but modal appeared")
+        async def close():
+            await self.backend.close_context(context)
 
-            return True
+        await self.resources.adopt("context", context, close)
+        await install_on_context(context, self.base_url, self.rate_limiter)
+        if self.artifacts:
+            await self.artifacts.watch(context)
 
-        except Exception as e:
-            logging.error(f"Error waiting for modal: {e}")
-            return False
-
-    async def click_enviar_automaticamente(self):
-        """Click the 'enviar automaticamente' button"""
-        try:
-            logging.info("Looking for 'Enviar Automaticamente' button")
-
-            # Try multiple selectors
-            selectors = [
-                'div:has-text("enviar automaticamente")',
-                'div:has-text("Enviar Automaticamente")',
-                'div:has-text("ENVIAR AUTOMATICAMENTE")',
-                '[data-testid*="enviar"]',
-                'button[type="submit"]',
-            ]
-
-            button = None
-            for selector in selectors:
-                try:
-                    button = await self.page.wait_for_selector(selector, timeout=5000)
-                    if button:
-                        logging.info(f"Found button with selector: {selector}")
-                        break
-                except:
-                    continue
-
-            if not button:
-                logging.error("Could not find 'enviar automaticamente' button")
-                return False
-
-            await button.click()
-            logging.info("Clicked 'enviar automaticamente' button")
+        # A persistent context opens with a blank page already
+        if context.pages:
+            self.page = context.pages[0]
+        else:
+            self.page = await context.new_page()
+        await self.resources.adopt("page", self.page, self.page.close)
+        self.flow.page = self.page
+
+    async def _switch_page(self, old_page, page):
+        """A page the flow prefetched in the same context becomes the main page"""
+        self.page = page
+        await self.resources.adopt("page", page, page.close)
+        await old_page.close()
+
+    async def _capture_failure(self, step_name, error=None):
+        """Keep what the page looked like when the run failed"""
+        if not self.artifacts or not hasattr(self, "page") or self.page.is_closed():
+            return
+        await self.artifacts.capture(self.page, step_name, error)
+
+    async def _step_failed(self, step, error):
+        await self._capture_failure(step.name, error)
+
+    async def recycle(self, mode):
+        """Recreate the context or browser, keeping cookies and the current URL"""
+        url = self.page.url
+        storage_state = await self.context.storage_state()
+
+        if mode == "context" and self.browser and self.backend.can_recycle_context:
+            await self.backend.close_context(self.context)
+            self.context = await self.backend.new_context(self.browser, storage_state)
+            await self._adopt_context()
+        else:
+            await self.backend.close_context(self.context)
+            if self.browser:
+                await self.browser.close()
+            await self._open_browser(storage_state)
 
-            # Wait a bit to see if there's any confirmation
-            await self.page.wait_for_timeout(3000)
+        if url.startswith("http"):
+            await self.page.goto(url, wait_until="domcontentloaded")
+        logging.info(f"Recycled browser {mode} to release memory")
 
-            return True
+    async def prewarm(self):
+        """Launch the browser and load the landing page ahead of the run"""
+        checkpoint = self.checkpoints.resume_point()
+        await self.setup_browser(checkpoint["storage_state"] if checkpoint else None)
+        await self.governor.sample("setup")
+        # The page the first step navigates to, the landing page or a deep link
+        await self.page.goto(self.steps[0].url, wait_until="domcontentloaded")
+        logging.info("Browser pre-warmed")
 
-        except Exception as e:
-            logging.error(f"Error clicking 'enviar automaticamente' button: {e}")
-            return False
+    async def check_login_status(self):
+        """Check if user is already logged in"""
+        return await is_logged_in(self.page)
 
     async def run_automation(self):
-        """Main automation flow"""
+        """Main automation flow, retried from the last good checkpoint"""
+        success = False
+        for attempt in range(1, self.run_attempts + 1):
+            if attempt > 1:
+                logging.info(
+                    f"Retrying from the last checkpoint "
+                    f"(attempt {attempt}/{self.run_attempts})"
+                )
+            success = await self._run_steps()
+            if success:
+                self.checkpoints.clear()
+                break
+
+        self.backend.record_run(success)
+        return success
+
+    async def _resume(self):
+        """Open or reuse a browser positioned at the last good checkpoint
+
+        Returns the name of the last step that does not need to run again.
+        """
+        checkpoint = self.checkpoints.resume_point()
+        storage_state = checkpoint["storage_state"] if checkpoint else None
+
+        if not hasattr(self, "page"):
+            await self.setup_browser(storage_state)
+            await self.governor.sample("setup")
+        elif self.page.is_closed():
+            # The browser went away, resume in a fresh one
+            await self._open_browser(storage_state)
+
+        if not checkpoint:
+            return None
+
+        logging.info(f"Resuming after checkpoint '{checkpoint['step']}'")
+        self.outputs.update(checkpoint["outputs"])
+        await self.page.goto(checkpoint["url"], wait_until="domcontentloaded")
+        return checkpoint["step"]
+
+    async def _after_step(self, step):
+        """Checkpoint a completed step and let the memory governor act"""
+        storage_state = None
+        if step.resumable:
+            storage_state = await self.context.storage_state()
+        self.checkpoints.record(
+            step.name, self.page.url, dict(self.outputs), storage_state=storage_state
+        )
+        # Recycling is only safe where the flow can be restored
+        await self.governor.checkpoint(
+            step.name, self.recycle if step.resumable else None
+        )
+
+    async def _run_steps(self):
+        """Run every automation step not yet covered by a checkpoint"""
         try:
             logging.info("Starting DevScout automation")
 
-            # Setup browser
-            await self.setup_browser()
+            completed = await self._resume()
+            names = [step.name for step in self.steps]
+            start = names.index(completed) + 1 if completed else 0
+            if completed and not await self.check_login_status():
+                # The saved session has expired, log in again
+                start = min(start, names.index("login"))
 
-            # Navigate to site
-            if not await self.navigate_to_site():
-                return False
-
-            # Check login status and login if needed
-            if not await self.check_login_status():
-                if not await self.login():
-                    return False
-
-            # Click procurar vagas button
-            if not await self.find_and_click_procurar_vagas():
-                return False
-
-            # Wait for modal and check vagas
-            if not await self.wait_for_modal_and_check_vagas():
-                return False
-
-            # Click enviar automaticamente
-            if not await self.click_enviar_automaticamente():
+            if not await self.flow.run(self.steps[start:], self._after_step):
                 return False
 
             logging.info("Automation completed successfully")
@@ -334,35 +213,49 @@ class DevScoutAutomation:
 
         except Exception as e:
             logging.error(f"Automation failed: {e}")
+            await self._capture_failure("run", str(e))
             return False
+        finally:
+            self.flow.report()
+            if self.flow.selector_stats:
+                self.flow.selector_stats.save()
+            self.governor.report()
+            self.rate_limiter.report()
 
     async def cleanup(self):
-        """Clean up resources"""
+        """Clean up resources and kill anything the run leaked"""
+        if self.artifacts:
+            await self.artifacts.flush()
         try:
-            if hasattr(self, "context"):
-                await self.context.close()
-            if hasattr(self, "browser"):
-                await self.browser.close()
-            if hasattr(self, "playwright"):
-                await self.playwright.stop()
+            await self.resources.aclose()
             logging.info("Cleanup completed")
         except Exception as e:
             logging.error(f"Cleanup error: {e}")
+        # Waits up to seconds for processes to exit, off the event loop
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.leak_detector.check
+        )
+
+    async def __aenter__(self):
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.leak_detector.snapshot
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.cleanup()
 
 
 async def main():
     """Main function"""
-    automation = DevScoutAutomation()
-
-    try:
+    async with DevScoutAutomation() as automation:
         success = await automation.run_automation()
         if success:
             logging.info("✅ DevScout automation completed successfully!")
         else:
             logging.error("❌ DevScout automation failed!")
-    finally:
-        await automation.cleanup()
 
 
 if __name__ == "__main__":
+    setup()
     asyncio.run(main())
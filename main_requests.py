@@ -4,30 +4,35 @@ Lightweight DevScout automation using requests + BeautifulSoup
 Works within PythonAnywhere free tier restrictions without Playwright downloads
 """
 
+import copy
 import requests
 import time
 import logging
 import os
-import re
-from bs4 import BeautifulSoup
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler("devscout_requests.log"), logging.StreamHandler()],
+
+import page_analysis
+from batch_apply import BatchApplier, targets_from_api
+from bundle_analyzer import BundleAnalyzer, vagas_route
+from config import base_url, load_config, setup
+from cookie_store import CookieStore
+from html_scan import (
+    PageScan,
+    enviar_analysis,
+    procurar_analysis,
+    scan_response,
+    scan_text,
 )
+from http_cache import HttpCache
+from rate_limiter import install_on_session
+
 
 
 class DevScoutRequestsAutomation:
-    def __init__(self):
-        self.email = os.getenv("EMAIL")
-        self.password = os.getenv("PASSWORD")
-        self.base_url = "https://devscout.app"
+    def __init__(self, email=None, password=None):
+        load_config()
+        self.email = email or os.getenv("EMAIL")
+        self.password = password or os.getenv("PASSWORD")
+        self.base_url = base_url()
 
         self.session = requests.Session()
         self.session.headers.update(
@@ -35,18 +40,48 @@ class DevScoutRequestsAutomation:
                 "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
             }
         )
+        # Throttles and adapts to 429/5xx, see rate_limiter.py
+        self.rate_limiter = install_on_session(self.session)
+        # Repeat runs revalidate pages instead of downloading them again
+        self.http_cache = HttpCache.from_env(namespace=self.email or "")
+        self.bundle_analyzer = BundleAnalyzer.from_env()
+        # Scan pages while they download instead of parsing them whole
+        self.stream_scan = os.getenv("STREAM_SCAN", "false").lower() == "true"
 
         if not self.email or not self.password:
             raise ValueError("EMAIL and PASSWORD must be set in environment variables")
 
+        # A still valid session from the last run skips the login
+        self.cookie_store = CookieStore.from_env(self.email)
+        self.cookie_store.load_into(self.session.cookies)
+
+    def prewarm(self):
+        """Open a pooled keep-alive connection to the site ahead of the run"""
+        try:
+            self.session.head(self.base_url, timeout=30, allow_redirects=True)
+            logging.info("Connection pre-warmed")
+        except Exception as e:
+            logging.warning(f"Pre-warming failed: {e}")
+
     def check_site_accessibility(self):
-        """Check if we can access the site"""
+        """Check if we can access the site
+
+        Returns the page HTML, or a `PageScan` of it with STREAM_SCAN.
+        """
         try:
-            response = self.session.get(self.base_url, timeout=30)
+            if self.stream_scan:
+                # A partly read page cannot be cached, so this skips the cache
+                response = self.session.get(self.base_url, timeout=30, stream=True)
+            else:
+                response = self.http_cache.get(self.session, self.base_url, timeout=30)
             if response.status_code == 200:
                 logging.info("✅ Successfully accessed DevScout")
+                if self.stream_scan:
+                    return True, scan_response(response)
                 return True, response.text
             else:
+                # A streamed response holds its connection until closed
+                response.close()
                 logging.error(
                     f"❌ Failed to access DevScout: HTTP {response.status_code}"
                 )
@@ -55,45 +90,30 @@ class DevScoutRequestsAutomation:
             logging.error(f"❌ Error accessing site: {e}")
             return False, None
 
-    def check_login_status(self, html_content):
-        """Check if user is logged in based on page content"""
-        if "Cadastrar / Login" in html_content or "Entrar com Google" in html_content:
+    def _logged_in(self, login_required):
+        if login_required:
             logging.info("🔐 User not logged in - login required")
             return False
         else:
             logging.info("✅ User appears to be logged in")
             return True
 
-    def extract_csrf_token(self, html_content):
-        """Extract CSRF token from login form"""
-        soup = BeautifulSoup(html_content, "html.parser")
-
-        # Look for CSRF token in various forms
-        csrf_token = None
-
-        # Check for meta tag
-        csrf_meta = soup.find("meta", {"name": "csrf-token"})
-        if csrf_meta:
-            csrf_token = csrf_meta.get("content")
-
-        # Check for hidden input
-        if not csrf_token:
-            csrf_input = soup.find("input", {"name": "csrf_token"})
-            if csrf_input:
-                csrf_token = csrf_input.get("value")
-
-        # Check for _token input
-        if not csrf_token:
-            token_input = soup.find("input", {"name": "_token"})
-            if token_input:
-                csrf_token = token_input.get("value")
+    def check_login_status(self, html_content):
+        """Check if user is logged in based on page content"""
+        if isinstance(html_content, PageScan):
+            return self._logged_in(html_content.login_prompt)
+        return self._logged_in(page_analysis.login_required(html_content))
 
-        if csrf_token:
+    def _found_csrf_token(self, token):
+        if token:
             logging.info("✅ Found CSRF token")
-            return csrf_token
         else:
             logging.warning("⚠️ No CSRF token found")
-            return None
+        return token
+
+    def extract_csrf_token(self, html_content):
+        """Extract CSRF token from login form"""
+        return self.analyze("csrf_token", html_content)
 
     def login(self, csrf_token):
         """Attempt login using requests session"""
@@ -152,64 +172,31 @@ class DevScoutRequestsAutomation:
             logging.error(f"❌ Login process failed: {e}")
             return False, None
 
+    def _procurar_found(self, results):
+        if results["button_found"]:
+            logging.info(f"✅ Found 'procurar vagas' button: {results['button_info']}")
+        if results["form_found"]:
+            logging.info(f"✅ Found job search form: {results['form_action']}")
+        if results["api_endpoint"]:
+            logging.info(f"✅ Found potential API endpoint: {results['api_endpoint']}")
+        return results
+
     def simulate_procurar_vagas(self, html_content):
         """Simulate clicking 'procurar vagas' by looking for API endpoints"""
-        try:
-            soup = BeautifulSoup(html_content, "html.parser")
-
-            # Look for buttons or forms related to job search
-            vagas_button = None
-            vagas_form = None
-            api_endpoint = None
-
-            # Find buttons with relevant text
-            buttons = soup.find_all(
-                ["button", "a"], string=re.compile(r"procurar\s*vagas", re.IGNORECASE)
-            )
-            if buttons:
-                vagas_button = buttons[0]
-                logging.info(
-                    f"✅ Found 'procurar vagas' button: {vagas_button.text.strip()}"
-                )
+        return self.analyze("procurar_vagas", html_content)
 
-            # Look for job search form
-            forms = soup.find_all("form")
-            for form in forms:
-                form_text = form.get_text().lower()
-                if "vaga" in form_text or "job" in form_text or "search" in form_text:
-                    vagas_form = form
-                    action = form.get("action", "")
-                    if "search" in action or "vaga" in action:
-                        api_endpoint = action
-                        logging.info(f"✅ Found job search form: {action}")
-                        break
-
-            # Look for API endpoints in JavaScript
-            scripts = soup.find_all("script")
-            for script in scripts:
-                script_text = script.string if script.string else ""
-                if "procurar" in script_text or "vagas" in script_text:
-                    # Extract potential API calls
-                    api_matches = re.findall(
-                        r'["\']([^"\']*(?:procurar|vagas|search)[^"\']*["\']',
-                        script_text,
-                    )
-                    if api_matches:
-                        api_endpoint = api_matches[0]
-                        logging.info(f"✅ Found potential API endpoint: {api_endpoint}")
-                        break
-
-            return {
-                "button_found": bool(vagas_button),
-                "form_found": bool(vagas_form),
-                "api_endpoint": api_endpoint,
-                "button_info": str(vagas_button.text.strip()) if vagas_button else None,
-                "form_action": vagas_form.get("action") if vagas_form else None,
-            }
+    def discover_api_in_bundles(self, html_content):
+        """Look for the vagas API in the external script bundles of a page"""
+        if isinstance(html_content, PageScan):
+            script_srcs = html_content.script_srcs
+        else:
+            script_srcs = scan_text(html_content).script_srcs
 
-        except Exception as e:
-            logging.error(f"❌ Error analyzing page: {e}")
-            return {}
+        routes = self.bundle_analyzer.discover(self.session, self.base_url, script_srcs)
+        api_endpoint = vagas_route(routes)
+        if api_endpoint:
+            logging.info(f"✅ Found potential API endpoint in bundles: {api_endpoint}")
+        return api_endpoint
 
     def check_for_vagas_api(self, analysis_results):
         """Try to find and use vagas API"""
@@ -225,7 +212,7 @@ class DevScoutRequestsAutomation:
             logging.info(f"🔍 Trying API endpoint: {api_url}")
 
             # Try GET request first
-            response = self.session.get(api_url, timeout=30)
+            response = self.http_cache.get(self.session, api_url, timeout=30)
             if response.status_code == 200:
                 logging.info("✅ Successfully accessed vagas API")
                 return True, response.text
@@ -246,57 +233,69 @@ class DevScoutRequestsAutomation:
             logging.error(f"❌ API call failed: {e}")
             return False, None
 
-    def simulate_enviar_automaticamente(self, html_content):
-        """Simulate 'enviar automaticamente' action"""
-        try:
-            soup = BeautifulSoup(html_content, "html.parser")
-
-            # Look for auto-apply buttons or forms
-            auto_buttons = soup.find_all(
-                ["button", "a"],
-                string=re.compile(r"enviar\s+automaticamente", re.IGNORECASE),
-            )
-            auto_forms = soup.find_all("form")
-
-            for form in auto_forms:
-                form_text = form.get_text().lower()
-                if "automatic" in form_text or "enviar" in form_text:
-                    action = form.get("action", "")
-                    if "apply" in action or "send" in action:
-                        logging.info(f"✅ Found auto-apply form: {action}")
-                        return {
-                            "found": True,
-                            "method": form.get("method", "POST"),
-                            "action": action,
-                            "form_data": self.extract_form_data(form),
-                        }
-
-            if auto_buttons:
-                return {
-                    "found": True,
-                    "button_text": auto_buttons[0].text.strip(),
-                    "button_info": str(auto_buttons[0]),
-                }
-
+    def _enviar_found(self, apply_info):
+        if apply_info.get("action"):
+            logging.info(f"✅ Found auto-apply form: {apply_info['action']}")
+        elif not apply_info["found"]:
             logging.warning("⚠️ No 'enviar automaticamente' button found")
-            return {"found": False}
-
+        return apply_info
+
+    # name -> (parse HTML, read a PageScan, report the results, result on error)
+    ANALYSES = {
+        "csrf_token": (
+            page_analysis.csrf_token,
+            lambda scan: scan.csrf_token,
+            _found_csrf_token,
+            None,
+        ),
+        "procurar_vagas": (
+            page_analysis.procurar_vagas,
+            procurar_analysis,
+            _procurar_found,
+            {},
+        ),
+        "enviar_automaticamente": (
+            page_analysis.enviar_automaticamente,
+            enviar_analysis,
+            _enviar_found,
+            {"found": False},
+        ),
+    }
+    # Stream scans stop at the login and vagas targets, before these
+    WHOLE_PAGE_ANALYSES = ("enviar_automaticamente",)
+
+    def _whole_page(self, name, scan):
+        """The page of a scan that stopped before analysis `name` could run"""
+        if name not in self.WHOLE_PAGE_ANALYSES or scan.complete:
+            return scan
+        logging.info(f"Fetching the whole page of {scan.url} for '{name}'")
+        return self.http_cache.get(self.session, scan.url, timeout=30).text
+
+    def _analysis_failed(self, name, error):
+        logging.error(f"❌ Error analyzing page ({name}): {error}")
+        return copy.deepcopy(self.ANALYSES[name][3])
+
+    def analyze(self, name, html_content):
+        """Run page analysis `name` of ANALYSES on HTML or a `PageScan`"""
+        parse, from_scan, report, _failed = self.ANALYSES[name]
+        try:
+            if isinstance(html_content, PageScan):
+                html_content = self._whole_page(name, html_content)
+            if isinstance(html_content, PageScan):
+                results = from_scan(html_content)
+            else:
+                results = parse(html_content)
         except Exception as e:
-            logging.error(f"❌ Error analyzing auto-apply: {e}")
-            return {"found": False}
+            return self._analysis_failed(name, e)
+        return report(self, results)
+
+    def simulate_enviar_automaticamente(self, html_content):
+        """Simulate 'enviar automaticamente' action"""
+        return self.analyze("enviar_automaticamente", html_content)
 
     def extract_form_data(self, form):
         """Extract form data for submission"""
-        form_data = {}
-
-        inputs = form.find_all("input")
-        for input_tag in inputs:
-            name = input_tag.get("name")
-            value = input_tag.get("value", "")
-            if name:
-                form_data[name] = value
-
-        return form_data
+        return page_analysis.form_data(form)
 
     def send_automatic_application(self, apply_info):
         """Send automatic application"""
@@ -335,6 +334,28 @@ class DevScoutRequestsAutomation:
             logging.error(f"❌ Error sending application: {e}")
             return False
 
+    def _worker_session(self):
+        """A session for one batch apply thread, with this session's cookies"""
+        session = requests.Session()
+        session.headers.update(self.session.headers)
+        session.cookies.update(self.session.cookies)
+        install_on_session(session, self.rate_limiter)
+        return session
+
+    def apply_to_vagas(self, vagas):
+        """Apply to every vaga concurrently, returning whether none failed
+
+        See batch_apply.py; vagas applied to before are skipped.
+        """
+        applier = BatchApplier.from_env()
+        try:
+            outcomes = applier.apply(
+                self._worker_session, self.base_url, self.email, vagas
+            )
+        finally:
+            applier.ledger.close()
+        return all(outcome["status"] != "failed" for outcome in outcomes)
+
     def run_automation(self):
         """Main automation flow using requests"""
         try:
@@ -345,7 +366,7 @@ class DevScoutRequestsAutomation:
             if not success:
                 return False
 
-            # Step 2: Check login status
+            # Step 2: Check login status (validates the saved session cookies)
             is_logged_in = self.check_login_status(content)
             if not is_logged_in:
                 # Step 3: Extract CSRF token and login
@@ -353,12 +374,16 @@ class DevScoutRequestsAutomation:
                 login_success, login_content = self.login(csrf_token)
                 if not login_success:
                     return False
+                self.cookie_store.save_from(self.session.cookies)
 
                 # Update with logged in content
                 content = login_content
 
             # Step 4: Analyze page for vagas functionality
             vagas_analysis = self.simulate_procurar_vagas(content)
+            if not vagas_analysis.get("api_endpoint"):
+                # SPAs keep their API routes in external bundles
+                vagas_analysis["api_endpoint"] = self.discover_api_in_bundles(content)
             logging.info(f"📊 Vagas analysis: {vagas_analysis}")
 
             # Step 5: Try to access vagas API
@@ -369,14 +394,22 @@ class DevScoutRequestsAutomation:
                 logging.error("❌ Cannot proceed - no vagas functionality found")
                 return False
 
-            # Step 6: Simulate auto-application
-            apply_info = self.simulate_enviar_automaticamente(content)
+            vagas = targets_from_api(content) if api_success else []
+            if vagas:
+                # Step 6/7: Apply to each listed vaga, concurrently
+                logging.info(f"📋 Vagas API listed {len(vagas)} vagas")
+                application_success = self.apply_to_vagas(vagas)
+            else:
+                # Step 6: Simulate auto-application
+                apply_info = self.simulate_enviar_automaticamente(content)
 
-            # Step 7: Send application if possible
-            application_success = self.send_automatic_application(apply_info)
+                # Step 7: Send application if possible
+                application_success = self.send_automatic_application(apply_info)
 
             if application_success:
                 logging.info("✅ DevScout requests automation completed successfully!")
+                # Keep cookies the site refreshed during the run
+                self.cookie_store.save_from(self.session.cookies)
                 return True
             else:
                 logging.error("❌ DevScout requests automation failed!")
@@ -386,12 +419,24 @@ class DevScoutRequestsAutomation:
             logging.error(f"❌ Automation failed: {e}")
             return False
 
+    def close(self):
+        """Release pooled connections"""
+        self.session.close()
+        self.http_cache.report()
+        self.rate_limiter.report()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
 
 def main():
     """Main function"""
     try:
-        automation = DevScoutRequestsAutomation()
-        success = automation.run_automation()
+        with DevScoutRequestsAutomation() as automation:
+            success = automation.run_automation()
 
         if success:
             print("🎉 Automation completed successfully!")
@@ -404,4 +449,5 @@ def main():
 
 
 if __name__ == "__main__":
+    setup("devscout_requests.log")
     main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Browser memory governor
+
+Samples the resident memory of the browser process tree between steps and
+recycles the browser context (or the whole browser) at a safe point once
+it grows past a configured ceiling.
+"""
+
+import logging
+import os
+
+from process_tree import format_bytes, tree_rss_bytes_async
+
+
+class MemoryGovernor:
+    """Tracks browser RSS per step and recycles above a ceiling"""
+
+    RECYCLE_MODES = ("context", "browser")
+
+    def __init__(self, ceiling_mb=0, recycle="context"):
+        if recycle not in self.RECYCLE_MODES:
+            raise ValueError(
+                f"BROWSER_RECYCLE must be one of: {', '.join(self.RECYCLE_MODES)}"
+            )
+        # A ceiling of 0 only reports memory, it never recycles
+        self.ceiling_bytes = int(ceiling_mb * 1024 * 1024)
+        self.recycle = recycle
+        self.samples = []
+        self.recycles = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            ceiling_mb=float(os.getenv("BROWSER_MEMORY_CEILING_MB", "0")),
+            recycle=os.getenv("BROWSER_RECYCLE", "context").lower(),
+        )
+
+    async def sample(self, step):
+        """Record the current browser memory for `step`"""
+        rss = await tree_rss_bytes_async()
+        self.samples.append((step, rss))
+        logging.debug(f"Browser memory after {step}: {format_bytes(rss)}")
+        return rss
+
+    async def checkpoint(self, step, recycler=None):
+        """Sample after `step` and recycle if over the ceiling
+
+        `recycler` is an async callable taking the recycle mode. Pass it
+        only when the flow is at a safe point, i.e. its state can be
+        restored from cookies and the current URL.
+        """
+        rss = await self.sample(step)
+        if not self.ceiling_bytes or rss is None or rss <= self.ceiling_bytes:
+            return False
+
+        if recycler is None:
+            # A later resumable step samples again and recycles if still over
+            logging.warning(
+                f"Browser memory {format_bytes(rss)} is over the ceiling "
+                f"after {step}, which is not a safe point to recycle at"
+            )
+            return False
+
+        logging.warning(
+            f"Browser memory {format_bytes(rss)} is over the ceiling "
+            f"of {format_bytes(self.ceiling_bytes)}, recycling the {self.recycle}"
+        )
+        await recycler(self.recycle)
+        self.recycles += 1
+        await self.sample(f"{step} (recycled)")
+        return True
+
+    def peak(self):
+        values = [rss for _step, rss in self.samples if rss is not None]
+        return max(values) if values else None
+
+    def report(self):
+        """Log the memory measured at every step of the run"""
+        if not self.samples:
+            return
+        for step, rss in self.samples:
+            logging.info(f"Memory after {step}: {format_bytes(rss)}")
+        logging.info(
+            f"Peak browser memory: {format_bytes(self.peak())}"
+            f" ({self.recycles} recycle(s))"
+        )
+        self.samples = []
+        self.recycles = 0
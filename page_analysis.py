@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+HTML analysis of the requests engine as plain functions
+
+Each function takes the page HTML as a string and returns plain data;
+logging and error handling stay with the caller.
+"""
+
+import re
+
+PROCURAR_BUTTON = re.compile(r"procurar\s*vagas", re.IGNORECASE)
+ENVIAR_BUTTON = re.compile(r"enviar\s+automaticamente", re.IGNORECASE)
+SCRIPT_API = re.compile(r'["\']([^"\']*(?:procurar|vagas|search)[^"\']*)["\']')
+
+
+def _soup(html_content):
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(html_content, "html.parser")
+
+
+def login_required(html_content):
+    """Whether the page asks the user to log in"""
+    return "Cadastrar / Login" in html_content or "Entrar com Google" in html_content
+
+
+def csrf_token(html_content):
+    """The CSRF token of the page's meta tag or login form, or None"""
+    soup = _soup(html_content)
+
+    csrf_meta = soup.find("meta", {"name": "csrf-token"})
+    if csrf_meta and csrf_meta.get("content"):
+        return csrf_meta.get("content")
+
+    for name in ("csrf_token", "_token"):
+        token_input = soup.find("input", {"name": name})
+        if token_input and token_input.get("value"):
+            return token_input.get("value")
+    return None
+
+
+def form_data(form):
+    """Names and values of the inputs of a BeautifulSoup form"""
+    return {
+        input_tag.get("name"): input_tag.get("value", "")
+        for input_tag in form.find_all("input")
+        if input_tag.get("name")
+    }
+
+
+def procurar_vagas(html_content):
+    """The 'procurar vagas' button, job search form and API endpoint of a page"""
+    soup = _soup(html_content)
+
+    buttons = soup.find_all(["button", "a"], string=PROCURAR_BUTTON)
+    vagas_button = buttons[0] if buttons else None
+
+    vagas_form = None
+    api_endpoint = None
+    for form in soup.find_all("form"):
+        form_text = form.get_text().lower()
+        if "vaga" in form_text or "job" in form_text or "search" in form_text:
+            vagas_form = form
+            action = form.get("action", "")
+            if "search" in action or "vaga" in action:
+                api_endpoint = action
+                break
+
+    # API calls in inline scripts win over the form action
+    for script in soup.find_all("script"):
+        script_text = script.string if script.string else ""
+        if "procurar" in script_text or "vagas" in script_text:
+            api_matches = SCRIPT_API.findall(script_text)
+            if api_matches:
+                api_endpoint = api_matches[0]
+                break
+
+    return {
+        "button_found": bool(vagas_button),
+        "form_found": bool(vagas_form),
+        "api_endpoint": api_endpoint,
+        "button_info": str(vagas_button.text.strip()) if vagas_button else None,
+        "form_action": vagas_form.get("action") if vagas_form else None,
+    }
+
+
+def enviar_automaticamente(html_content):
+    """The auto-apply form (with its data) or button of a page"""
+    soup = _soup(html_content)
+
+    for form in soup.find_all("form"):
+        form_text = form.get_text().lower()
+        if "automatic" in form_text or "enviar" in form_text:
+            action = form.get("action", "")
+            if "apply" in action or "send" in action:
+                return {
+                    "found": True,
+                    "method": form.get("method", "POST"),
+                    "action": action,
+                    "form_data": form_data(form),
+                }
+
+    auto_buttons = soup.find_all(["button", "a"], string=ENVIAR_BUTTON)
+    if auto_buttons:
+        return {
+            "found": True,
+            "button_text": auto_buttons[0].text.strip(),
+            "button_info": str(auto_buttons[0]),
+        }
+    return {"found": False}
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Persistent browser user-data directory with a reusable HTTP disk cache
+
+Keeping the user-data directory between runs lets the browser revalidate
+the DevScout SPA bundles, CSS and fonts instead of downloading them again.
+The directory is kept under a size limit, pruned periodically and moved
+aside when the browser can no longer open it. Every account has a profile
+of its own below USER_DATA_DIR: a profile holds the session cookies, and
+the browser locks it while it is open.
+"""
+
+import logging
+import os
+import shutil
+import time
+
+from process_tree import format_bytes
+from storage import account_key
+
+
+class PersistentProfile:
+    """A browser user-data directory that survives between runs"""
+
+    IN_USE_MARKER = ".devscout-in-use"
+    PRUNE_STAMP = ".devscout-last-prune"
+    # Lock files a crashed Chromium leaves behind, which block the next launch
+    STALE_LOCKS = ["SingletonLock", "SingletonSocket", "SingletonCookie"]
+    # Launch errors about the directory itself; anything else (a missing
+    # browser, bad launch options, a timeout) leaves the profile alone
+    PROFILE_ERRORS = [
+        "singleton",
+        "profile",
+        "user data directory",
+        "user-data-dir",
+        "corrupt",
+    ]
+
+    def __init__(self, path, max_size_mb=300, prune_interval_hours=24):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.prune_interval = prune_interval_hours * 3600
+
+    @classmethod
+    def from_env(cls, account):
+        """The profile of `account` below USER_DATA_DIR, or None when not configured"""
+        directory = os.getenv("USER_DATA_DIR")
+        if not directory:
+            return None
+        return cls(
+            os.path.join(directory, f"profile-{account_key(account)}"),
+            max_size_mb=float(os.getenv("USER_DATA_MAX_MB", "300")),
+            prune_interval_hours=float(os.getenv("USER_DATA_PRUNE_HOURS", "24")),
+        )
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def prepare(self):
+        """Create the directory, recover from unclean shutdowns and prune"""
+        os.makedirs(self.path, exist_ok=True)
+
+        if os.path.exists(self._file(self.IN_USE_MARKER)):
+            if self._owner_alive():
+                raise RuntimeError(f"Browser profile {self.path} is already in use")
+            logging.warning("Previous run did not close the browser profile cleanly")
+            self._remove_stale_locks()
+
+        if self._prune_due():
+            self.prune()
+
+    def _owner_alive(self):
+        """Whether the process that marked the profile in use still runs"""
+        try:
+            with open(self._file(self.IN_USE_MARKER), encoding="utf-8") as f:
+                pid = int(f.read().strip())
+        except (OSError, ValueError):
+            return False
+        if pid == os.getpid():
+            return False
+        try:
+            os.kill(pid, 0)
+        except OSError:
+            return False
+        return True
+
+    def _remove_stale_locks(self):
+        for name in self.STALE_LOCKS:
+            try:
+                os.remove(self._file(name))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logging.warning(f"Could not remove stale lock {name}: {e}")
+
+    def mark_open(self):
+        with open(self._file(self.IN_USE_MARKER), "w", encoding="utf-8") as f:
+            f.write(str(os.getpid()))
+
+    def mark_closed(self):
+        try:
+            os.remove(self._file(self.IN_USE_MARKER))
+        except FileNotFoundError:
+            pass
+
+    def size_bytes(self):
+        """Total size of the directory on disk"""
+        total = 0
+        for root, _dirs, files in os.walk(self.path):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    continue
+        return total
+
+    def _prune_due(self):
+        try:
+            last_prune = os.path.getmtime(self._file(self.PRUNE_STAMP))
+        except OSError:
+            return True
+        return time.time() - last_prune >= self.prune_interval
+
+    def prune(self):
+        """Evict least recently used cache files until under the size limit"""
+        size = self.size_bytes()
+        if size > self.max_size_bytes:
+            # Leave headroom so pruning does not run on every launch
+            target = self.max_size_bytes * 0.8
+            logging.info(
+                f"Browser profile is {format_bytes(size)}, "
+                f"pruning cache to {format_bytes(target)}"
+            )
+            for path, file_size in self._cache_files_oldest_first():
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                size -= file_size
+                if size <= target:
+                    break
+
+            if size > self.max_size_bytes:
+                # Whatever is left is not cache, the profile itself has grown
+                logging.warning("Browser profile still over limit, resetting it")
+                self.quarantine()
+                os.makedirs(self.path, exist_ok=True)
+
+        with open(self._file(self.PRUNE_STAMP), "w", encoding="utf-8") as f:
+            f.write(str(time.time()))
+
+    def _cache_files_oldest_first(self):
+        files = []
+        for root, _dirs, names in os.walk(self.path):
+            if "cache" not in os.path.relpath(root, self.path).lower():
+                continue
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((max(stat.st_atime, stat.st_mtime), path, stat.st_size))
+
+        return [(path, size) for _used, path, size in sorted(files)]
+
+    def is_profile_error(self, error):
+        """Whether a launch failed because of the user-data directory"""
+        message = str(error).lower()
+        return any(marker in message for marker in self.PROFILE_ERRORS)
+
+    def quarantine(self):
+        """Move a broken profile aside, keeping only the latest broken copy"""
+        if not os.path.exists(self.path):
+            return
+
+        parent, name = os.path.split(self.path)
+        for old in os.listdir(parent or "."):
+            if old.startswith(f"{name}.corrupt-"):
+                shutil.rmtree(os.path.join(parent, old), ignore_errors=True)
+
+        destination = f"{self.path}.corrupt-{int(time.time())}"
+        os.replace(self.path, destination)
+        logging.warning(f"Moved browser profile aside to {destination}")
+
+    async def launch(self, browser_type, profile, headless=True):
+        """Open a persistent context using a launch profile's settings
+
+        If the browser reports that it cannot open the directory, the
+        directory is treated as corrupt, moved aside and the launch is
+        retried once with a fresh profile. Other launch errors are raised.
+        """
+        options = dict(profile["launch"], **profile["context"])
+
+        self.prepare()
+        try:
+            context = await browser_type.launch_persistent_context(
+                self.path, headless=headless, **options
+            )
+        except Exception as e:
+            if not self.is_profile_error(e):
+                raise
+            logging.error(f"Could not open browser profile {self.path}: {e}")
+            self.quarantine()
+            self.prepare()
+            context = await browser_type.launch_persistent_context(
+                self.path, headless=headless, **options
+            )
+
+        self.mark_open()
+        return context
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Pre-warming of DNS, connections and the browser before a scheduled run
+
+The scheduler starts jobs PREWARM_SECONDS before their fire time. The job
+resolves and caches the DevScout host names, lets the engine open its
+connections (and, with PREWARM_BROWSER, launch the browser and load the
+landing page), then waits for the fire time and runs with everything
+warm.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import profiling
+from config import base_url, load_config
+from engines import is_async, load_engine
+
+DNS_CACHE_ENTRIES = 64
+
+
+@contextmanager
+def dns_cache(ttl=300, max_entries=DNS_CACHE_ENTRIES):
+    """Cache `socket.getaddrinfo` results for `ttl` seconds within the block
+
+    At most `max_entries` lookups are kept, least recently used first out,
+    and the real resolver is back once the block ends, so a scheduler
+    running jobs inline does not keep a cache across jobs.
+    """
+    resolve = socket.getaddrinfo
+    cache = OrderedDict()
+    lock = threading.Lock()
+
+    def getaddrinfo(*args, **kwargs):
+        key = (args, tuple(sorted(kwargs.items())))
+        now = time.monotonic()
+        with lock:
+            cached = cache.get(key)
+            if cached and cached[0] > now:
+                cache.move_to_end(key)
+                return cached[1]
+        result = resolve(*args, **kwargs)
+        with lock:
+            cache[key] = (now + ttl, result)
+            cache.move_to_end(key)
+            while len(cache) > max_entries:
+                cache.popitem(last=False)
+        return result
+
+    socket.getaddrinfo = getaddrinfo
+    try:
+        yield
+    finally:
+        socket.getaddrinfo = resolve
+
+
+def warm_dns(url):
+    """Resolve the host of `url` into the DNS cache"""
+    parsed = urlparse(url)
+    host = parsed.hostname
+    port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    started = time.perf_counter()
+    try:
+        socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except OSError as e:
+        logging.warning(f"Could not resolve {host}: {e}")
+        return
+    logging.info(f"Resolved {host} in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+def _seconds_until(start_at):
+    return max(0.0, start_at - time.time())
+
+
+async def _run_async(engine, start_at, email, password, launch_browser):
+    async with profiling.watch_event_loop(), load_engine(engine)(
+        email=email, password=password
+    ) as automation:
+        if launch_browser:
+            try:
+                await automation.prewarm()
+            except Exception as e:
+                # The run opens its own browser as usual
+                logging.warning(f"Pre-warming the browser failed: {e}")
+        await asyncio.sleep(_seconds_until(start_at))
+        return await automation.run_automation()
+
+
+def run_engine_at(engine, start_at, email=None, password=None):
+    """Warm up, wait until `start_at` (a Unix time) and run the engine
+
+    A picklable counterpart of `engines.run_engine` for the worker pool.
+    """
+    load_config()
+    launch_browser = os.getenv("PREWARM_BROWSER", "true").lower() == "true"
+
+    with dns_cache(float(os.getenv("PREWARM_DNS_TTL", "300"))):
+        warm_dns(base_url())
+        with profiling.session(engine):
+            if is_async(engine):
+                return asyncio.run(
+                    _run_async(engine, start_at, email, password, launch_browser)
+                )
+
+            with load_engine(engine)(email=email, password=password) as automation:
+                automation.prewarm()
+                time.sleep(_seconds_until(start_at))
+                return automation.run_automation()
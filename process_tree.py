@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Process tree helpers used to measure and clean up browser processes
+
+Listing processes runs `ps`; async code uses `tree_rss_bytes_async`, or
+an executor, so the event loop is not blocked meanwhile.
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import subprocess
+import time
+
+
+def list_processes():
+    """Return {pid: (ppid, rss_bytes, command)} for every running process"""
+    try:
+        result = subprocess.run(
+            ["ps", "-A", "-o", "pid=,ppid=,rss=,comm="],
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        logging.debug(f"Could not list processes: {e}")
+        return {}
+
+    processes = {}
+    for line in result.stdout.splitlines():
+        parts = line.split(None, 3)
+        if len(parts) < 3:
+            continue
+        try:
+            pid, ppid, rss_kb = int(parts[0]), int(parts[1]), int(parts[2])
+        except ValueError:
+            continue
+        command = parts[3].strip() if len(parts) > 3 else ""
+        processes[pid] = (ppid, rss_kb * 1024, command)
+
+    return processes
+
+
+def descendants(pid=None, processes=None):
+    """Return the pids of every process below `pid` (default: this process)"""
+    pid = os.getpid() if pid is None else pid
+    processes = list_processes() if processes is None else processes
+
+    children = {}
+    for child, (ppid, _rss, _command) in processes.items():
+        children.setdefault(ppid, []).append(child)
+
+    found = []
+    pending = list(children.get(pid, []))
+    while pending:
+        child = pending.pop()
+        found.append(child)
+        pending.extend(children.get(child, []))
+
+    return found
+
+
+def tree_rss_bytes(pid=None, processes=None):
+    """Total resident memory of the processes below `pid`, or None if unknown"""
+    processes = list_processes() if processes is None else processes
+    if not processes:
+        return None
+
+    return sum(processes[child][1] for child in descendants(pid, processes))
+
+
+async def tree_rss_bytes_async(pid=None):
+    """`tree_rss_bytes` for the event loop, running `ps` on the default executor"""
+    return await asyncio.get_running_loop().run_in_executor(
+        None, tree_rss_bytes, pid
+    )
+
+
+def format_bytes(size):
+    """Human readable memory size"""
+    if size is None:
+        return "n/a"
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def kill_processes(pids, grace=2.0):
+    """Terminate `pids`, escalating to SIGKILL after `grace` seconds
+
+    Returns the pids that ignored SIGTERM and had to be killed.
+    """
+    pids = [pid for pid in pids if pid != os.getpid()]
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            continue
+
+    deadline = time.monotonic() + grace
+    alive = list(pids)
+    while alive and time.monotonic() < deadline:
+        time.sleep(0.1)
+        alive = [pid for pid in alive if _is_alive(pid)]
+
+    for pid in alive:
+        try:
+            os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+        except OSError:
+            continue
+
+    return alive
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    return True
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Opt-in instrumentation: event-loop stall detection and whole-run profiles
+
+STALL_THRESHOLD_MS=100 starts a watchdog thread next to the asyncio
+loop. When the loop does not run its heartbeat for longer than the
+threshold, the watchdog logs where the loop thread is stuck, and the
+heartbeat logs how long the stall lasted.
+
+PROFILER=cprofile writes a cProfile file (open with `python -m pstats`
+or snakeviz); PROFILER=sample samples the running thread's stack every
+PROFILE_INTERVAL_MS and writes collapsed stacks, the input format of
+flamegraph.pl and speedscope. Files go to PROFILE_DIR.
+"""
+
+import asyncio
+import cProfile
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+
+
+def _innermost_frames(frame, limit=6):
+    """The innermost frames of a stack as `file:line function` entries"""
+    entries = traceback.extract_stack(frame)[-limit:]
+    return " <- ".join(
+        f"{os.path.basename(entry.filename)}:{entry.lineno} {entry.name}"
+        for entry in reversed(entries)
+    )
+
+
+class StallWatchdog:
+    """Reports event-loop callbacks that block longer than `threshold_ms`"""
+
+    def __init__(self, threshold_ms=100):
+        self.threshold = threshold_ms / 1000
+        self.interval = self.threshold / 4
+        self.stalls = []
+        self._stop = threading.Event()
+
+    def _beat(self):
+        now = time.monotonic()
+        late = now - self._expected
+        if late > self.threshold:
+            self.stalls.append(late)
+            logging.warning(f"Event loop was blocked for {late * 1000:.0f} ms")
+        self._last = now
+        self._expected = now + self.interval
+        self._handle = self._loop.call_later(self.interval, self._beat)
+
+    def _watch(self):
+        reported = None
+        while not self._stop.wait(self.interval):
+            if time.monotonic() - self._last <= self.threshold:
+                continue
+            if reported == self._last:
+                # Already reported this stall
+                continue
+            reported = self._last
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                logging.warning(f"Event loop blocked in {_innermost_frames(frame)}")
+
+    def start(self, loop):
+        self._loop = loop
+        self._thread_id = threading.get_ident()
+        self._last = time.monotonic()
+        self._expected = self._last + self.interval
+        self._handle = loop.call_later(self.interval, self._beat)
+        self._thread = threading.Thread(
+            target=self._watch, name="stall-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._handle.cancel()
+        self._thread.join()
+        if self.stalls:
+            logging.info(
+                f"Event loop stalled {len(self.stalls)} times, "
+                f"longest {max(self.stalls) * 1000:.0f} ms"
+            )
+
+
+@asynccontextmanager
+async def watch_event_loop():
+    """Run the block under a StallWatchdog when STALL_THRESHOLD_MS is set"""
+    threshold_ms = float(os.getenv("STALL_THRESHOLD_MS", "0"))
+    if threshold_ms <= 0:
+        yield None
+        return
+
+    watchdog = StallWatchdog(threshold_ms)
+    watchdog.start(asyncio.get_running_loop())
+    try:
+        yield watchdog
+    finally:
+        watchdog.stop()
+
+
+class SamplingProfiler:
+    """Samples one thread's stack and counts collapsed stacks"""
+
+    def __init__(self, interval_ms=5):
+        self.interval = interval_ms / 1000
+        self.samples = Counter()
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            self.samples[
+                ";".join(
+                    f"{entry.name} ({os.path.basename(entry.filename)}:{entry.lineno})"
+                    for entry in stack
+                )
+            ] += 1
+
+    def start(self):
+        self._thread_id = threading.get_ident()
+        self._thread = threading.Thread(
+            target=self._sample, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path):
+        """Write collapsed stacks, one `frame;frame;frame count` per line"""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def session(name):
+    """Profile the block as selected by PROFILER (off, cprofile or sample)"""
+    mode = os.getenv("PROFILER", "off").lower()
+    if mode not in ("cprofile", "sample"):
+        yield
+        return
+
+    directory = os.getenv("PROFILE_DIR", "profiles")
+    os.makedirs(directory, exist_ok=True)
+    stem = os.path.join(directory, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}")
+
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(f"{stem}.prof")
+            logging.info(f"cProfile written to {stem}.prof")
+        return
+
+    profiler = SamplingProfiler(float(os.getenv("PROFILE_INTERVAL_MS", "5")))
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        profiler.dump(f"{stem}.folded")
+        logging.info(
+            f"{sum(profiler.samples.values())} stack samples written to {stem}.folded"
+        )
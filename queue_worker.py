@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Worker that runs account jobs from the durable queue in job_queue.py
+
+Start one per host (or several); each leases up to WORKER_PROCESSES jobs
+at a time and runs them in isolated worker processes, see worker_pool.py.
+Passwords are not stored in the queue: every worker looks them up in its
+own configuration (EMAIL/PASSWORD or ACCOUNTS_FILE).
+"""
+
+import logging
+import os
+import time
+
+from config import account_password, load_config, setup
+from engines import DEFAULT_ENGINE, run_engine
+from job_queue import JobQueue, worker_id
+from prewarm import run_engine_at
+from worker_pool import JobPool
+
+
+def run_account(engine, email, start_at=None):
+    """Run the job of one account, queued or scheduled, in a worker process"""
+    password = account_password(email)
+    if not password:
+        raise ValueError(f"No password configured for {email} on this worker")
+    if start_at:
+        return run_engine_at(engine, start_at, email, password)
+    return run_engine(engine, email, password)
+
+
+def enqueue_accounts(job_queue, accounts, engine=DEFAULT_ENGINE, start_at=None):
+    """Queue today's run for every account; already queued runs are skipped
+
+    Jobs with `start_at` pre-warm when leased and run at that Unix time.
+    """
+    day = time.strftime("%Y-%m-%d", time.localtime(start_at))
+    for account in accounts:
+        job_queue.enqueue(
+            {"engine": engine, "email": account["email"], "start_at": start_at},
+            # One run per account and day, whichever engine runs it
+            f"{account['email']}:{day}",
+        )
+
+
+def main(once=False):
+    """Lease and run jobs until interrupted (or, with `once`, the queue is empty)"""
+    load_config()
+    job_queue = JobQueue.from_env()
+    if not job_queue:
+        logging.error("QUEUE_DB must be set to run a queue worker")
+        return False
+
+    pool = JobPool.from_env()
+    owner = worker_id()
+    tick = float(os.getenv("SCHEDULER_TICK_SECONDS", "1"))
+    # pool job id -> leased job
+    leased = {}
+    last_renewal = time.monotonic()
+    logging.info(f"Queue worker {owner} started on {job_queue.path}")
+
+    try:
+        while True:
+            while pool.free_slots():
+                job = job_queue.lease(owner)
+                if not job:
+                    break
+                payload = job["payload"]
+                job_id = f"{job['dedup_key']}#{job['attempts']}"
+                leased[job_id] = job
+                pool.submit(
+                    job_id,
+                    run_account,
+                    payload["engine"],
+                    payload["email"],
+                    payload.get("start_at"),
+                )
+
+            for result in pool.poll():
+                job = leased.pop(result["job_id"], None)
+                if job is None:
+                    # Aborted after losing its lease, just before it finished
+                    continue
+                if result["status"] == "ok" and result["value"]:
+                    logging.info(f"✅ Job {job['dedup_key']} completed")
+                    recorded = job_queue.complete(job["id"], owner, {"success": True})
+                else:
+                    error = result.get("error") or "automation failed"
+                    logging.error(f"❌ Job {job['dedup_key']} failed: {error}")
+                    recorded = job_queue.fail(job["id"], owner, error)
+                if not recorded:
+                    logging.warning(
+                        f"Lost the lease of job {job['dedup_key']} before its "
+                        f"result was recorded, another worker owns it now"
+                    )
+
+            # Renew well before the lease runs out
+            if time.monotonic() - last_renewal > job_queue.lease_seconds / 3:
+                last_renewal = time.monotonic()
+                for job_id, job in list(leased.items()):
+                    if not job_queue.renew(job["id"], owner):
+                        # Another worker may run it already: stop ours
+                        logging.error(
+                            f"Lost the lease of job {job['dedup_key']}, aborting it"
+                        )
+                        pool.cancel(job_id)
+                        del leased[job_id]
+
+            if once and not leased:
+                return True
+            time.sleep(tick)
+    except KeyboardInterrupt:
+        logging.info("Queue worker stopped by user")
+        return True
+    finally:
+        # Killed jobs are retried by other workers once their lease expires
+        pool.shutdown()
+        job_queue.close()
+
+
+if __name__ == "__main__":
+    setup()
+    main()
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Shared rate limiter and concurrency governor for traffic to DevScout
+
+Every outbound request takes a token from its host's bucket and from a
+global bucket, and holds one of `max_concurrency` slots until its
+response arrives. 429 and 5xx responses halve the host's rate and honour
+Retry-After; every successful response adds a little of it back (AIMD),
+so throughput settles at the highest rate the site tolerates.
+
+The requests engine is limited through its session (see
+`install_on_session`). The Playwright engines are limited through route
+interception only with RATE_LIMIT_BROWSER=true (see `install_on_context`),
+since a context with routes loses its HTTP cache. With
+RATE_LIMIT_STATE_FILE the buckets are shared through a locked file by
+every process on the host, e.g. the scheduler's worker processes.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import storage
+
+MIN_RATE_FACTOR = 0.05
+RATE_RECOVERY_STEP = 0.05
+BACKOFF_SECONDS = 5.0
+
+_shared = None
+
+
+def retry_after_seconds(value):
+    """Parse a Retry-After header (seconds or an HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """Token buckets per host and overall, plus a cap on requests in flight"""
+
+    def __init__(
+        self,
+        host_rate=5.0,
+        host_burst=20,
+        global_rate=10.0,
+        global_burst=40,
+        max_concurrency=6,
+        state_file=None,
+    ):
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.max_concurrency = max_concurrency
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._buckets = {}
+        # (loop, future) of coroutines waiting for a slot, woken by release()
+        self._waiters = []
+        self._metrics = {"requests": 0, "waited_s": 0.0, "throttled": 0, "errors": 0}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            host_rate=float(os.getenv("RATE_LIMIT_PER_HOST", "5")),
+            host_burst=int(os.getenv("RATE_LIMIT_BURST", "20")),
+            global_rate=float(os.getenv("RATE_LIMIT_GLOBAL", "10")),
+            global_burst=int(os.getenv("RATE_LIMIT_GLOBAL_BURST", "40")),
+            max_concurrency=int(os.getenv("RATE_LIMIT_CONCURRENCY", "6")),
+            state_file=os.getenv("RATE_LIMIT_STATE_FILE") or None,
+        )
+
+    @contextmanager
+    def _state(self):
+        """The bucket state, locked across threads (and processes, with a file)"""
+        with self._lock:
+            # Without file locks (Windows) buckets are per process only
+            if not self.state_file or not storage.CAN_LOCK:
+                yield self._buckets
+                return
+
+            with open(self.state_file, "a+", encoding="utf-8") as f:
+                storage.lock(f)
+                f.seek(0)
+                try:
+                    buckets = json.loads(f.read() or "{}")
+                except ValueError:
+                    buckets = {}
+                yield buckets
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(buckets))
+
+    def _bucket(self, buckets, key, burst, now):
+        return buckets.setdefault(
+            key, {"tokens": burst, "updated": now, "factor": 1.0, "blocked_until": 0}
+        )
+
+    def _refill(self, bucket, rate, burst, now):
+        elapsed = max(0.0, now - bucket["updated"])
+        refill = elapsed * rate * bucket["factor"]
+        bucket["tokens"] = min(burst, bucket["tokens"] + refill)
+        bucket["updated"] = now
+
+    def _reserve(self, host):
+        """Take a token for `host` or return how long to wait for one"""
+        now = time.time()
+        with self._state() as buckets:
+            host_bucket = self._bucket(buckets, host, self.host_burst, now)
+            global_bucket = self._bucket(buckets, "*", self.global_burst, now)
+            self._refill(host_bucket, self.host_rate, self.host_burst, now)
+            self._refill(global_bucket, self.global_rate, self.global_burst, now)
+
+            if host_bucket["blocked_until"] > now:
+                return host_bucket["blocked_until"] - now
+
+            waits = []
+            for bucket, rate in (
+                (host_bucket, self.host_rate),
+                (global_bucket, self.global_rate),
+            ):
+                if bucket["tokens"] < 1:
+                    waits.append((1 - bucket["tokens"]) / (rate * bucket["factor"]))
+            if waits:
+                return max(waits)
+
+            host_bucket["tokens"] -= 1
+            global_bucket["tokens"] -= 1
+            return 0.0
+
+    def _count(self, waited):
+        with self._lock:
+            self._metrics["requests"] += 1
+            self._metrics["waited_s"] += waited
+
+    def acquire(self, host):
+        """Block until a request to `host` may be sent; pair with `release()`"""
+        started = time.monotonic()
+        self._slots.acquire()
+        try:
+            while True:
+                wait = self._reserve(host)
+                if not wait:
+                    break
+                time.sleep(wait)
+        except BaseException:
+            self._slots.release()
+            raise
+        self._count(time.monotonic() - started)
+
+    async def _off_loop(self, fn, *args):
+        # With a state file every bucket update is file I/O; keep it off the loop
+        if self.state_file and storage.CAN_LOCK:
+            return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+        return fn(*args)
+
+    async def _acquire_slot_async(self):
+        loop = asyncio.get_running_loop()
+        while not self._slots.acquire(blocking=False):
+            waiter = loop.create_future()
+            with self._lock:
+                self._waiters.append((loop, waiter))
+            # A slot released before the waiter was registered woke nobody
+            if self._slots.acquire(blocking=False):
+                with self._lock:
+                    if (loop, waiter) in self._waiters:
+                        self._waiters.remove((loop, waiter))
+                return
+            await waiter
+
+    async def acquire_async(self, host):
+        """`acquire()` for the event loop: waits without blocking it"""
+        started = time.monotonic()
+        await self._acquire_slot_async()
+        try:
+            while True:
+                wait = await self._off_loop(self._reserve, host)
+                if not wait:
+                    break
+                await asyncio.sleep(wait)
+        except BaseException:
+            self.release()
+            raise
+        self._count(time.monotonic() - started)
+
+    def release(self):
+        self._slots.release()
+        with self._lock:
+            waiters, self._waiters = self._waiters, []
+        # Every waiting coroutine retries; those that lose wait again
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(_wake, waiter)
+
+    def feedback(self, host, status, retry_after=None):
+        """Adapt the host's rate to a response status"""
+        now = time.time()
+        throttled = status == 429 or status >= 500
+        with self._state() as buckets:
+            bucket = self._bucket(buckets, host, self.host_burst, now)
+            if throttled:
+                bucket["factor"] = max(MIN_RATE_FACTOR, bucket["factor"] / 2)
+                delay = retry_after_seconds(retry_after) or BACKOFF_SECONDS
+                bucket["blocked_until"] = max(bucket["blocked_until"], now + delay)
+            elif bucket["factor"] < 1:
+                bucket["factor"] = min(1.0, bucket["factor"] + RATE_RECOVERY_STEP)
+            factor = bucket["factor"]
+
+        if throttled:
+            with self._lock:
+                self._metrics["throttled" if status == 429 else "errors"] += 1
+            logging.warning(
+                f"{host} answered HTTP {status}, slowing down to "
+                f"{self.host_rate * factor:.2f} requests/s"
+            )
+
+    async def feedback_async(self, host, status, retry_after=None):
+        """`feedback()` for the event loop"""
+        await self._off_loop(self.feedback, host, status, retry_after)
+
+    def metrics(self):
+        """Requests sent, time spent waiting, throttling seen and current rates"""
+        with self._lock:
+            metrics = dict(self._metrics)
+        with self._state() as buckets:
+            metrics["rates"] = {
+                host: round(self.host_rate * bucket["factor"], 2)
+                for host, bucket in buckets.items()
+                if host != "*"
+            }
+        return metrics
+
+    def report(self):
+        metrics = self.metrics()
+        if metrics["requests"]:
+            logging.info(
+                f"Rate limiter: {metrics['requests']} requests, "
+                f"{metrics['waited_s']:.1f}s waiting, "
+                f"{metrics['throttled']} throttled, {metrics['errors']} server errors",
+                extra={"rate_limiter": metrics},
+            )
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+def shared_limiter():
+    """The limiter every engine in this process uses"""
+    global _shared
+    if _shared is None:
+        _shared = RateLimiter.from_env()
+    return _shared
+
+
+def install_on_session(session, limiter=None):
+    """Limit every request a `requests` session sends"""
+    from requests.adapters import HTTPAdapter
+
+    limiter = limiter or shared_limiter()
+
+    class RateLimitedAdapter(HTTPAdapter):
+        def send(self, request, **kwargs):
+            limiter.acquire(urlparse(request.url).hostname)
+            try:
+                return super().send(request, **kwargs)
+            finally:
+                limiter.release()
+
+    def on_response(response, *args, **kwargs):
+        limiter.feedback(
+            urlparse(response.url).hostname,
+            response.status_code,
+            response.headers.get("Retry-After"),
+        )
+
+    adapter = RateLimitedAdapter()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.hooks["response"].append(on_response)
+    return limiter
+
+
+async def install_on_context(context, base_url, limiter=None):
+    """Limit a Playwright context's requests to the host of `base_url`
+
+    Opt-in with RATE_LIMIT_BROWSER=true: Playwright disables the HTTP
+    cache of a context with routes, so every page load then refetches its
+    scripts and styles. Third-party hosts (fonts, analytics) are not
+    limited.
+    """
+    if os.getenv("RATE_LIMIT_BROWSER", "false").lower() != "true":
+        return None
+
+    limiter = limiter or shared_limiter()
+    site = urlparse(base_url).hostname
+    in_flight = set()
+
+    def is_site(url):
+        host = urlparse(url).hostname or ""
+        return host == site or host.endswith(f".{site}")
+
+    async def limit(route):
+        await limiter.acquire_async(urlparse(route.request.url).hostname)
+        in_flight.add(route.request)
+        try:
+            # Hand over to other routes, e.g. the profile's resource blocking
+            await route.fallback()
+        except Exception:
+            done(route.request)
+            raise
+
+    def done(request):
+        if request in in_flight:
+            in_flight.discard(request)
+            limiter.release()
+
+    def closed(_context):
+        # Requests cut off by closing the context never finish
+        for request in list(in_flight):
+            done(request)
+
+    async def on_response(response):
+        if is_site(response.url):
+            await limiter.feedback_async(
+                urlparse(response.url).hostname,
+                response.status,
+                response.headers.get("retry-after"),
+            )
+
+    await context.route(is_site, limit)
+    context.on("requestfinished", done)
+    context.on("requestfailed", done)
+    context.on("response", on_response)
+    context.on("close", closed)
+    return limiter
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Learned deep links into the DevScout app
+
+The first run reaches the vagas modal by clicking through the landing
+page; if the modal lives at its own URL, that URL is remembered per site.
+Later runs jump straight to it. Only a URL the click navigated to is
+learned; a page that merely stays at its URL while the modal opens (a
+dashboard, say) is not a deep link. A deep link that stops showing the
+modal `max_failures` times in a row is forgotten and never learned again,
+and the click chain is used (and a new route learned) instead.
+"""
+
+import json
+import logging
+import os
+import time
+
+from storage import atomic_write
+
+# Forgotten deep links remembered so they are not learned again
+MAX_REJECTED = 10
+
+
+class RouteMemory:
+    """Remembered vagas URL of one site, persisted in a JSON file"""
+
+    def __init__(self, path, site, max_failures=2):
+        self.path = path
+        self.site = site.rstrip("/")
+        self.max_failures = max_failures
+        # The URL the "procurar vagas" click was made at, see `clicked`
+        self._clicked_at = None
+
+    @classmethod
+    def from_env(cls, site):
+        """The route memory for `site`, or None with DEEP_LINKS=false"""
+        if os.getenv("DEEP_LINKS", "true").lower() != "true":
+            return None
+        return cls(
+            os.getenv("ROUTE_MEMORY_FILE", ".route_memory.json"),
+            site,
+            max_failures=int(os.getenv("DEEP_LINK_MAX_FAILURES", "2")),
+        )
+
+    def _read_all(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable route memory: {e}")
+            return {}
+
+    def _update(self, change):
+        data = self._read_all()
+        entry = change(data.get(self.site))
+        if entry:
+            data[self.site] = entry
+        else:
+            data.pop(self.site, None)
+        try:
+            with atomic_write(self.path) as f:
+                json.dump(data, f, indent=2)
+        except OSError as e:
+            logging.warning(f"Could not save route memory: {e}")
+
+    def vagas_url(self):
+        """The learned vagas URL, or None"""
+        entry = self._read_all().get(self.site)
+        return entry.get("url") if entry else None
+
+    def clicked(self, url):
+        """Note that "procurar vagas" was clicked on the page at `url`"""
+        self._clicked_at = url
+
+    def learn(self, url):
+        """Remember `url` if the click navigated to it and the modal lives there"""
+        clicked_at, self._clicked_at = self._clicked_at, None
+        if clicked_at is None or url.rstrip("/") == clicked_at.rstrip("/"):
+            return
+        if url.rstrip("/") == self.site or not url.startswith(self.site):
+            return
+        entry = self._read_all().get(self.site) or {}
+        if entry.get("url") == url or url in entry.get("rejected", []):
+            return
+
+        def remember(entry):
+            rejected = (entry or {}).get("rejected", [])
+            return {
+                "url": url,
+                "failures": 0,
+                "learned": time.time(),
+                "rejected": rejected,
+            }
+
+        self._update(remember)
+        logging.info(f"Learned the vagas deep link {url}")
+
+    def succeeded(self):
+        entry = self._read_all().get(self.site)
+        if not entry or not entry.get("failures"):
+            return
+
+        def reset(entry):
+            if entry:
+                entry["failures"] = 0
+            return entry
+
+        self._update(reset)
+
+    def failed(self):
+        """Count a failed deep link, forgetting it after too many"""
+
+        def count(entry):
+            if not entry or not entry.get("url"):
+                return entry
+            entry["failures"] += 1
+            if entry["failures"] >= self.max_failures:
+                logging.warning(f"Forgetting the vagas deep link {entry['url']}")
+                rejected = entry.get("rejected", []) + [entry["url"]]
+                return {"rejected": rejected[-MAX_REJECTED:]}
+            return entry
+
+        self._update(count)
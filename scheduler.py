@@ -1,67 +1,155 @@
-import asyncio
 import logging
 import schedule
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
-from dotenv import load_dotenv
 
-from main import DevScoutAutomation
-
-# Load environment variables
-load_dotenv()
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler("devscout.log"), logging.StreamHandler()],
-)
-
-
-def run_automation_job():
-    """Run the automation job"""
+from config import accounts, load_config, setup
+from engines import DEFAULT_ENGINE
+from job_queue import JobQueue
+from queue_worker import enqueue_accounts, run_account
+from worker_pool import JobPool
+
+# Browser work runs in worker processes, see worker_pool.py
+pool = None
+# With QUEUE_DB set, jobs are queued for queue_worker.py instead
+job_queue = None
+
+
+def log_result(result):
+    """Log the outcome of a job that ran in a worker process"""
+    job_id = result["job_id"]
+    if result["status"] == "ok" and result["value"]:
+        logging.info(
+            f"✅ Scheduled automation {job_id} completed successfully! "
+            f"({result['duration']:.0f}s)"
+        )
+    elif result["status"] == "ok":
+        logging.error(f"❌ Scheduled automation {job_id} failed!")
+    else:
+        logging.error(
+            f"❌ Scheduled automation {job_id} {result['status']}: {result['error']}"
+        )
+        if result.get("traceback"):
+            logging.debug(result["traceback"])
     logging.info("=" * 50)
-    logging.info(f"Starting scheduled automation job at {datetime.now()}")
 
-    try:
-        # Run the async automation
-        automation = DevScoutAutomation()
-        success = asyncio.run(automation.run_automation())
 
-        if success:
-            logging.info("✅ Scheduled automation completed successfully!")
-        else:
-            logging.error("❌ Scheduled automation failed!")
+def run_automation_job(engine=None, start_at=None):
+    """Run the automation job
 
-    except Exception as e:
-        logging.error(f"Scheduled job error: {e}")
+    With `start_at` (a Unix time) the job is started early to pre-warm
+    and runs at `start_at`, see prewarm.py.
+    """
+    engine = engine or os.getenv("ENGINE", DEFAULT_ENGINE)
 
     logging.info("=" * 50)
+    logging.info(f"Starting scheduled automation job at {datetime.now()}")
 
-
-def setup_scheduler():
+    configured = accounts()
+    if not configured:
+        logging.error("No account configured, set EMAIL/PASSWORD or ACCOUNTS_FILE")
+        return
+
+    if job_queue:
+        enqueue_accounts(job_queue, configured, engine, start_at=start_at)
+        return
+
+    started = f"{datetime.now():%Y%m%d-%H%M%S}"
+    # One job per account, like the queue's
+    for account in configured:
+        email = account["email"]
+        args = (engine, email, start_at)
+        if pool:
+            # The engine (and Playwright) is only imported in the worker process
+            pool.submit(f"{engine}-{email}-{started}", run_account, *args)
+            continue
+
+        try:
+            success = run_account(*args)
+
+            if success:
+                logging.info(
+                    f"✅ Scheduled automation for {email} completed successfully!"
+                )
+            else:
+                logging.error(f"❌ Scheduled automation for {email} failed!")
+
+        except Exception as e:
+            logging.error(f"Scheduled job error for {email}: {e}")
+
+    if not pool:
+        logging.info("=" * 50)
+
+
+def prewarmed_job(engine, schedule_time, prewarm_seconds):
+    """Start the job early; it runs at the `schedule_time` (HH:MM) it warms up for
+
+    A start that comes late (a busy or suspended host) runs right away
+    rather than waiting for the next day.
+    """
+    due = datetime.now() + timedelta(seconds=prewarm_seconds)
+    at = datetime.strptime(schedule_time, "%H:%M").time()
+    # The fire time nearest to when this start expected it, also across midnight
+    fires = [
+        datetime.combine(due.date() + timedelta(days=days), at) for days in (-1, 0, 1)
+    ]
+    fire = min(fires, key=lambda fire: abs(fire - due))
+    run_automation_job(engine, start_at=fire.timestamp())
+
+
+def setup_scheduler(engine=None):
     """Setup the daily scheduler"""
+    global pool, job_queue
+    load_config()
     schedule_time = os.getenv("SCHEDULE_TIME", "09:00")
 
-    # Schedule daily job
-    schedule.every().day.at(schedule_time).do(run_automation_job)
+    job_queue = JobQueue.from_env()
+    if job_queue:
+        logging.info(f"Jobs are queued in {job_queue.path} for queue workers")
+    # WORKER_PROCESSES=0 runs jobs inline in the scheduler process
+    elif int(os.getenv("WORKER_PROCESSES", "2")) > 0:
+        pool = JobPool.from_env()
+        logging.info(
+            f"Jobs run in up to {pool.max_workers} worker processes, "
+            f"killed after {pool.timeout:.0f}s"
+        )
+
+    # Schedule daily job, started early to warm up DNS, connections and browser
+    prewarm_seconds = int(os.getenv("PREWARM_SECONDS", "60"))
+    if prewarm_seconds > 0:
+        fire = datetime.strptime(schedule_time, "%H:%M")
+        start = (fire - timedelta(seconds=prewarm_seconds)).strftime("%H:%M:%S")
+        schedule.every().day.at(start).do(
+            prewarmed_job, engine, schedule_time, prewarm_seconds
+        )
+        logging.info(f"Pre-warming starts {prewarm_seconds}s early, at {start}")
+    else:
+        schedule.every().day.at(schedule_time).do(run_automation_job, engine)
 
     logging.info(f"Scheduler setup complete - will run daily at {schedule_time}")
     logging.info("Press Ctrl+C to stop the scheduler")
 
 
-def main():
+def main(engine=None):
     """Main scheduler function"""
-    setup_scheduler()
+    setup_scheduler(engine)
+    tick = float(os.getenv("SCHEDULER_TICK_SECONDS", "1"))
 
     try:
         while True:
             schedule.run_pending()
-            time.sleep(60)  # Check every minute
+            if pool:
+                for result in pool.poll():
+                    log_result(result)
+            time.sleep(tick)
     except KeyboardInterrupt:
         logging.info("Scheduler stopped by user")
+    finally:
+        if pool:
+            pool.shutdown()
 
 
 if __name__ == "__main__":
+    setup()
     main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Selector health statistics with learned ordering
+
+Every selector the flow engine tries is recorded as a hit (with the time
+it took to match) or a miss (a full timeout). The next run tries the
+candidates of each lookup by success rate, then by latency, so the live
+selector is usually the first one tried. Selectors that did not match in
+the last `dead_after` lookups of their label are reported as dead. That
+counts lookups another selector won before they were even tried, so a
+fallback ranked below a live selector is reported too.
+"""
+
+import json
+import logging
+import os
+
+from storage import atomic_write
+
+
+class SelectorStats:
+    """Hits, misses and latency per lookup label and selector"""
+
+    def __init__(self, path, dead_after=10):
+        self.path = path
+        self.dead_after = dead_after
+        self._stats = None
+
+    @classmethod
+    def from_env(cls):
+        """The statistics in SELECTOR_STATS_FILE, or None with SELECTOR_STATS=false"""
+        if os.getenv("SELECTOR_STATS", "true").lower() != "true":
+            return None
+        return cls(
+            os.getenv("SELECTOR_STATS_FILE", ".selector_stats.json"),
+            dead_after=int(os.getenv("SELECTOR_DEAD_AFTER", "10")),
+        )
+
+    def _load(self):
+        if self._stats is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._stats = json.load(f)
+            except FileNotFoundError:
+                self._stats = {}
+            except (OSError, ValueError) as e:
+                logging.warning(f"Ignoring unreadable selector statistics: {e}")
+                self._stats = {}
+        return self._stats
+
+    def _entry(self, label, selector):
+        return (
+            self._load()
+            .setdefault(label, {})
+            .setdefault(selector, {"hits": 0, "misses": 0, "idle": 0, "hit_ms": 0.0})
+        )
+
+    def order(self, label, selectors):
+        """`selectors` sorted by success rate, then average match time
+
+        Selectors without statistics count as 50% and keep their order.
+        """
+        stats = self._load().get(label, {})
+
+        def score(indexed):
+            index, selector = indexed
+            entry = stats.get(selector)
+            if not entry:
+                return (-0.5, float("inf"), index)
+            # Laplace smoothing, so one early miss does not bury a selector
+            rate = (entry["hits"] + 1) / (entry["hits"] + entry["misses"] + 2)
+            latency = entry["hit_ms"] / entry["hits"] if entry["hits"] else float("inf")
+            return (-rate, latency, index)
+
+        ranked = sorted(enumerate(selectors), key=score)
+        return [selector for _index, selector in ranked]
+
+    def record(self, label, selector, hit, elapsed_ms):
+        entry = self._entry(label, selector)
+        if hit:
+            entry["hits"] += 1
+            entry["hit_ms"] += elapsed_ms
+        else:
+            entry["misses"] += 1
+
+    def lookup(self, label, selectors, winner):
+        """Record a finished lookup that `winner` (or no selector) matched"""
+        for selector in selectors:
+            entry = self._entry(label, selector)
+            entry["idle"] = 0 if selector == winner else entry.get("idle", 0) + 1
+
+    def dead(self):
+        """(label, selector) pairs that matched none of the last `dead_after` lookups"""
+        return [
+            (label, selector)
+            for label, selectors in self._load().items()
+            for selector, entry in selectors.items()
+            if entry.get("idle", 0) >= self.dead_after
+        ]
+
+    def save(self):
+        """Persist the statistics and warn about dead selectors"""
+        if self._stats is None:
+            return
+        try:
+            with atomic_write(self.path) as f:
+                json.dump(self._stats, f, indent=2)
+        except OSError as e:
+            # Called after every run; losing some statistics must not fail it
+            logging.warning(f"Could not save selector statistics: {e}")
+
+        for label, selector in self.dead():
+            logging.warning(
+                f"Selector for {label} has not matched in {self.dead_after}+ "
+                f"lookups and could be removed: {selector}"
+            )
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Helpers for the files and SQLite databases several processes share
+
+Cookie jars, checkpoints and the rate limiter state are locked with
+`flock`, so concurrent workers on one host never read a half-written
+file. On Windows there is no `fcntl` and the locks are per process only.
+Files are replaced through `atomic_write`, whose temporary file is unique
+per writer, so concurrent saves never clobber each other's.
+
+SQLite databases opened with `connect` use the rollback journal, not WAL:
+WAL keeps its index in shared memory, so every process would have to be
+on one host, and it does not work on network filesystems at all. The
+rollback journal only needs working POSIX locks (a local disk, or NFSv4
+with locking; not SMB or Dropbox).
+"""
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no locking
+    fcntl = None
+
+# Whether `lock` excludes other processes
+CAN_LOCK = fcntl is not None
+
+
+def account_key(account):
+    """A file-name-safe key for an account, without its email address"""
+    return hashlib.sha256(account.encode()).hexdigest()[:16]
+
+
+def lock(f):
+    """Lock the open file `f` exclusively until it is closed"""
+    if fcntl:
+        fcntl.flock(f, fcntl.LOCK_EX)
+
+
+@contextmanager
+def locked(path):
+    """Hold the lock file of `path` (`path` + ".lock"), creating its directory"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.lock", "a") as f:
+        lock(f)
+        yield
+
+
+@contextmanager
+def atomic_write(path):
+    """Open a temporary text file that replaces `path` once it was written
+
+    The file is only readable by the owner. Nothing is replaced when the
+    block raises; errors, e.g. OSError, are left to the caller.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with open(fd, "w", encoding="utf-8") as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def connect(path):
+    """An autocommit connection to an SQLite database shared between hosts"""
+    # Write transactions are opened explicitly, see `transaction`
+    db = sqlite3.connect(path, timeout=30, isolation_level=None)
+    db.execute("PRAGMA journal_mode=DELETE")
+    return db
+
+
+@contextmanager
+def transaction(db):
+    """Take an SQLite write lock up front, so reads inside see a stable database
+
+    `db` must be in autocommit mode (`isolation_level=None`).
+    """
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        yield db
+    except BaseException:
+        db.execute("ROLLBACK")
+        raise
+    db.execute("COMMIT")
@@ -0,0 +1,92 @@
+import batch_apply
+from batch_apply import ApplicationLedger, BatchApplier, idempotency_key
+
+
+class Response:
+    def __init__(self, status_code, location=None):
+        self.status_code = status_code
+        self.headers = {"Location": location} if location else {}
+
+
+class Session:
+    def __init__(self, responses):
+        self.responses = responses
+        self.posts = []
+        self.closed = False
+
+    def post(self, url, **kwargs):
+        self.posts.append((url, kwargs))
+        return self.responses[url]
+
+    def close(self):
+        self.closed = True
+
+
+def test_claim_skips_applied_and_in_flight_vagas(tmp_path, monkeypatch):
+    ledger = ApplicationLedger(str(tmp_path / "ledger.db"), claim_seconds=600)
+    key = idempotency_key("a@example.com", 1)
+
+    assert ledger.claim(key, "a@example.com", 1) is None
+    assert ledger.claim(key, "a@example.com", 1) == "being sent by another run"
+
+    # A claim left by a crashed run is retried
+    later = batch_apply.time.time() + 601
+    monkeypatch.setattr(batch_apply.time, "time", lambda: later)
+    assert ledger.claim(key, "a@example.com", 1) is None
+
+    ledger.record(key, True, 200, 1)
+    assert ledger.claim(key, "a@example.com", 1) == "already applied"
+
+
+def test_redirect_to_login_is_not_applied(tmp_path):
+    base_url = "https://devscout.app"
+    responses = {
+        f"{base_url}/api/vagas/1/apply": Response(200),
+        f"{base_url}/api/vagas/2/apply": Response(303, "/vagas"),
+        f"{base_url}/api/vagas/3/apply": Response(302, "/login?next=/vagas"),
+    }
+    sessions = []
+
+    def new_session():
+        sessions.append(Session(responses))
+        return sessions[-1]
+
+    applier = BatchApplier(ApplicationLedger(str(tmp_path / "ledger.db")))
+    outcomes = applier.apply(
+        new_session, base_url, "a@example.com", [{"id": 1}, {"id": 2}, {"id": 3}]
+    )
+
+    statuses = {outcome["vaga"]: outcome["status"] for outcome in outcomes}
+    assert statuses == {1: "applied", 2: "applied", 3: "failed"}
+    assert all(session.closed for session in sessions)
+    for session in sessions:
+        for _url, kwargs in session.posts:
+            assert kwargs["allow_redirects"] is False
+            assert kwargs["headers"]["Idempotency-Key"]
+
+
+def test_applied_vagas_are_skipped_on_the_next_run(tmp_path):
+    base_url = "https://devscout.app"
+    responses = {f"{base_url}/apply/1": Response(201)}
+    applier = BatchApplier(ApplicationLedger(str(tmp_path / "ledger.db")))
+    vagas = [{"id": 1, "apply_url": "/apply/1"}]
+
+    applier.apply(lambda: Session(responses), base_url, "a@example.com", vagas)
+    outcomes = applier.apply(
+        lambda: Session(responses), base_url, "a@example.com", vagas
+    )
+    assert outcomes == [{"vaga": 1, "status": "skipped", "reason": "already applied"}]
+
+
+def test_throttled_application_is_retried(tmp_path):
+    class Throttled(Session):
+        def post(self, url, **kwargs):
+            self.posts.append((url, kwargs))
+            return Response(429 if len(self.posts) == 1 else 200)
+
+    applier = BatchApplier(ApplicationLedger(str(tmp_path / "ledger.db")), retries=1)
+    outcomes = applier.apply(
+        lambda: Throttled({}), "https://devscout.app", "a@example.com", [{"id": 1}]
+    )
+    assert outcomes[0]["status"] == "applied"
+    assert outcomes[0]["attempts"] == 2
@@ -0,0 +1,74 @@
+from html_scan import enviar_analysis, procurar_analysis, scan_response, scan_text
+
+
+class Response:
+    url = "https://devscout.app/"
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.encoding = "utf-8"
+        self.closed = False
+
+    def iter_content(self, chunk_size, decode_unicode=False):
+        yield from self.chunks
+
+    def close(self):
+        self.closed = True
+
+
+def test_login_prompt_split_across_chunks():
+    scan = scan_response(
+        Response(['<html><a href="/login">Cadastrar / ', "Login</a></html>"])
+    )
+    assert scan.login_prompt
+
+
+def test_login_prompt_split_in_the_middle_of_a_word():
+    chunks = ["<button>Entrar co", "m Google</button>"]
+    assert scan_response(Response(chunks)).login_prompt
+
+
+def test_login_prompt_in_a_script():
+    scan = scan_text('<script>render("Cadastrar / Login")</script>')
+    assert scan.login_prompt
+
+
+def test_logged_in_page_has_no_login_prompt():
+    response = Response(["<html><button>Cadastrar</button>", " / Sair</html>"])
+    scan = scan_response(response)
+    assert not scan.login_prompt
+    assert scan.complete
+    assert response.closed
+
+
+def test_scan_stops_once_the_targets_are_found():
+    response = Response(
+        [
+            "<button>Procurar Vagas</button>",
+            '<script>fetch("/api/vagas/search")</script>',
+            "<p>never read</p>",
+        ]
+    )
+    scan = scan_response(response)
+    assert not scan.complete
+    assert response.closed
+    assert procurar_analysis(scan) == {
+        "button_found": True,
+        "form_found": False,
+        "api_endpoint": "/api/vagas/search",
+        "button_info": "Procurar Vagas",
+        "form_action": None,
+    }
+
+
+def test_enviar_form():
+    scan = scan_text(
+        '<form action="/apply" method="POST">Enviar automaticamente'
+        '<input name="vaga" value="1"></form>'
+    )
+    assert enviar_analysis(scan) == {
+        "found": True,
+        "method": "POST",
+        "action": "/apply",
+        "form_data": {"vaga": "1"},
+    }
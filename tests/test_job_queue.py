@@ -0,0 +1,52 @@
+import job_queue
+from job_queue import JobQueue
+
+
+def queue(tmp_path, **kwargs):
+    return JobQueue(str(tmp_path / "queue.db"), **kwargs)
+
+
+def test_enqueue_is_deduplicated(tmp_path):
+    jobs = queue(tmp_path)
+    assert jobs.enqueue({"email": "a@example.com"}, "a@example.com:2026-10-19")
+    assert jobs.enqueue({"email": "a@example.com"}, "a@example.com:2026-10-19") is None
+    assert jobs.counts() == {"queued": 1}
+
+
+def test_a_leased_job_is_not_leased_again(tmp_path):
+    jobs = queue(tmp_path)
+    jobs.enqueue({}, "job")
+    assert jobs.lease("worker-1")["payload"] == {}
+    assert jobs.lease("worker-2") is None
+
+
+def test_expired_lease_is_taken_over(tmp_path, monkeypatch):
+    jobs = queue(tmp_path, lease_seconds=10)
+    jobs.enqueue({}, "job")
+    job = jobs.lease("worker-1")
+
+    later = job_queue.time.time() + 11
+    monkeypatch.setattr(job_queue.time, "time", lambda: later)
+    taken = jobs.lease("worker-2")
+    assert taken["id"] == job["id"]
+    assert taken["attempts"] == 2
+
+    # The first worker lost its lease
+    assert not jobs.renew(job["id"], "worker-1")
+    assert not jobs.complete(job["id"], "worker-1")
+    assert jobs.complete(job["id"], "worker-2", {"success": True})
+    assert jobs.counts() == {"done": 1}
+
+
+def test_failed_job_is_retried_then_dead(tmp_path):
+    jobs = queue(tmp_path, max_attempts=2, retry_delay=0)
+    jobs.enqueue({}, "job")
+
+    job = jobs.lease("worker")
+    assert jobs.fail(job["id"], "worker", "boom")
+    assert jobs.counts() == {"queued": 1}
+
+    job = jobs.lease("worker")
+    assert jobs.fail(job["id"], "worker", "boom")
+    assert jobs.counts() == {"dead": 1}
+    assert not jobs.fail(job["id"], "worker", "boom")
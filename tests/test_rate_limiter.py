@@ -0,0 +1,74 @@
+import rate_limiter
+import storage
+from rate_limiter import MIN_RATE_FACTOR, RateLimiter, retry_after_seconds
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+def limiter(monkeypatch, **kwargs):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter.time, "time", clock.time)
+    options = dict(host_rate=2.0, host_burst=2, global_rate=100.0, global_burst=100)
+    options.update(kwargs)
+    return RateLimiter(**options), clock
+
+
+def test_burst_then_wait_for_a_token(monkeypatch):
+    limits, clock = limiter(monkeypatch)
+    assert limits._reserve("devscout.app") == 0.0
+    assert limits._reserve("devscout.app") == 0.0
+    assert limits._reserve("devscout.app") == 0.5
+
+    clock.now += 0.5
+    assert limits._reserve("devscout.app") == 0.0
+
+
+def test_global_bucket_limits_every_host(monkeypatch):
+    limits, _clock = limiter(monkeypatch, global_rate=1.0, global_burst=1)
+    assert limits._reserve("a.devscout.app") == 0.0
+    assert limits._reserve("b.devscout.app") == 1.0
+
+
+def test_429_halves_the_rate_and_honours_retry_after(monkeypatch):
+    limits, clock = limiter(monkeypatch)
+    limits.feedback("devscout.app", 429, "7")
+
+    assert limits.metrics()["rates"]["devscout.app"] == 1.0
+    assert limits._reserve("devscout.app") == 7.0
+    clock.now += 7
+    assert limits._reserve("devscout.app") == 0.0
+
+
+def test_server_errors_back_off_and_successes_recover(monkeypatch):
+    limits, _clock = limiter(monkeypatch)
+    for _ in range(10):
+        limits.feedback("devscout.app", 503)
+    assert limits._buckets["devscout.app"]["factor"] == MIN_RATE_FACTOR
+
+    limits.feedback("devscout.app", 200)
+    assert limits._buckets["devscout.app"]["factor"] > MIN_RATE_FACTOR
+    assert limits.metrics()["errors"] == 10
+
+
+def test_state_file_shares_buckets_between_limiters(monkeypatch, tmp_path):
+    path = str(tmp_path / "rate_limit.json")
+    first, _clock = limiter(monkeypatch, state_file=path)
+    second = RateLimiter(host_rate=2.0, host_burst=2, state_file=path)
+
+    first._reserve("devscout.app")
+    first._reserve("devscout.app")
+    if storage.CAN_LOCK:
+        assert second._reserve("devscout.app") == 0.5
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds("3") == 3.0
+    assert retry_after_seconds("-1") == 0.0
+    assert retry_after_seconds("soon") is None
+    assert retry_after_seconds(None) is None
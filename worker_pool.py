@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Process-isolated job execution with hard wall-clock timeouts
+
+Each job runs in its own worker process (and process group), so a hung
+page or a crashing browser can be killed without touching the scheduler.
+Results and log records are sent back to the parent over queues.
+"""
+
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import time
+import traceback
+from collections import deque
+
+import log_pipeline
+from process_tree import descendants, kill_processes
+
+
+def _worker_main(results, log_queue, job_id, target, args):
+    """Entry point of a worker process"""
+    if hasattr(os, "setsid"):
+        # Own process group, so the browser can be killed together with us
+        os.setsid()
+    log_pipeline.attach_to(log_queue)
+
+    started = time.monotonic()
+    try:
+        value = target(*args)
+        result = {"status": "ok", "value": value}
+    except BaseException as e:
+        result = {
+            "status": "error",
+            "error": str(e),
+            "traceback": traceback.format_exc(),
+        }
+    result.update(job_id=job_id, duration=time.monotonic() - started)
+    results.put(result)
+
+
+class JobPool:
+    """Runs jobs in at most `max_workers` processes, killing them after `timeout`"""
+
+    def __init__(self, max_workers=2, timeout=900):
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        # spawn: workers never inherit the parent's threads or event loop
+        self._mp = multiprocessing.get_context("spawn")
+        self._results = self._mp.Queue()
+        self._log_queue = self._mp.Queue()
+        self._log_forwarder = log_pipeline.forward_from(self._log_queue)
+        self._pending = deque()
+        # job_id -> (process, deadline)
+        self._running = {}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_workers=int(os.getenv("WORKER_PROCESSES", "2")),
+            timeout=float(os.getenv("JOB_TIMEOUT_SECONDS", "900")),
+        )
+
+    def submit(self, job_id, target, *args):
+        """Queue `target(*args)`; `target` must be a picklable module-level function"""
+        self._pending.append((job_id, target, args))
+        self._start_pending()
+
+    def busy(self):
+        return len(self._running) + len(self._pending)
+
+    def free_slots(self):
+        return max(0, self.max_workers - self.busy())
+
+    def _start_pending(self):
+        while self._pending and len(self._running) < self.max_workers:
+            job_id, target, args = self._pending.popleft()
+            process = self._mp.Process(
+                target=_worker_main,
+                args=(self._results, self._log_queue, job_id, target, args),
+                name=f"job-{job_id}",
+                # Not a daemon: jobs may start processes of their own (the
+                # analysis executor's); shutdown() stops them explicitly
+                daemon=False,
+            )
+            process.start()
+            self._running[job_id] = (process, time.monotonic() + self.timeout)
+            logging.info(f"Started job {job_id} in worker process {process.pid}")
+
+    def poll(self):
+        """Collect finished jobs, kill overdue ones and start queued ones
+
+        Returns a list of result dicts with `job_id`, `status` ("ok",
+        "error", "timeout" or "crashed") and `value`/`error`.
+        """
+        finished = []
+        while True:
+            try:
+                result = self._results.get_nowait()
+            except queue.Empty:
+                break
+            finished.append(result)
+            entry = self._running.pop(result["job_id"], None)
+            if entry:
+                entry[0].join(timeout=5)
+
+        now = time.monotonic()
+        for job_id, (process, deadline) in list(self._running.items()):
+            if process.is_alive():
+                if now > deadline:
+                    del self._running[job_id]
+                    self._kill(process, "hard timeout")
+                    finished.append(
+                        {
+                            "job_id": job_id,
+                            "status": "timeout",
+                            "error": f"killed after {self.timeout:.0f}s",
+                        }
+                    )
+            elif process.exitcode != 0 or now > deadline:
+                # Exited without reporting a result, e.g. killed by the OOM killer
+                del self._running[job_id]
+                finished.append(
+                    {
+                        "job_id": job_id,
+                        "status": "crashed",
+                        "error": f"worker exited with code {process.exitcode}",
+                    }
+                )
+            # Otherwise it exited cleanly and its result is still in flight
+
+        self._start_pending()
+        return finished
+
+    def cancel(self, job_id):
+        """Drop a queued job or kill a running one; it reports no result"""
+        self._pending = deque(job for job in self._pending if job[0] != job_id)
+        entry = self._running.pop(job_id, None)
+        if entry:
+            self._kill(entry[0], "cancelled")
+
+    def _kill(self, process, reason):
+        """Kill a worker together with every browser process it started"""
+        logging.warning(f"Killing worker process {process.pid} ({reason})")
+        children = descendants(process.pid)
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (AttributeError, OSError):
+            process.kill()
+        # Children that left the worker's process group
+        kill_processes(children, grace=0)
+        process.join(timeout=5)
+
+    def shutdown(self, kill=True):
+        """Stop the pool, killing running jobs unless `kill` is False
+
+        Without `kill` running jobs may finish, but are still killed at
+        their deadline.
+        """
+        self._pending.clear()
+        for process, deadline in self._running.values():
+            if not kill:
+                process.join(timeout=max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                self._kill(process, "shutdown")
+        self._running = {}
+        self._log_forwarder.stop()